@@ -0,0 +1,27 @@
+"""signature detached
+
+Revision ID: 2b7d4f8e1a36
+Revises: 3a9b6e2d1f70
+Create Date: 2026-10-17 16:05:27.930145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7d4f8e1a36'
+down_revision: Union[str, None] = '3a9b6e2d1f70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Set by /sign/signDetached when it stores a manifest; no earlier row is one
+    op.add_column('signatures', sa.Column('detached', sa.Boolean(), server_default='false', nullable=False), schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_column('signatures', 'detached', schema='esign')
@@ -0,0 +1,32 @@
+"""signature blob store
+
+Revision ID: 3a9b6e2d1f70
+Revises: e0a4c7f18d92
+Create Date: 2026-10-17 15:08:37.219460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9b6e2d1f70'
+down_revision: Union[str, None] = 'e0a4c7f18d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signatures', sa.Column('content_digest', sa.String(length=64), nullable=True), schema='esign')
+    op.add_column('signatures', sa.Column('content_size', sa.BigInteger(), nullable=True), schema='esign')
+    op.add_column('signatures', sa.Column('storage_key', sa.Text(), nullable=True), schema='esign')
+    op.create_index(op.f('ix_esign_signatures_content_digest'), 'signatures', ['content_digest'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_signatures_content_digest'), table_name='signatures', schema='esign')
+    op.drop_column('signatures', 'storage_key', schema='esign')
+    op.drop_column('signatures', 'content_size', schema='esign')
+    op.drop_column('signatures', 'content_digest', schema='esign')
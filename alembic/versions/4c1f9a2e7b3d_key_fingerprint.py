@@ -0,0 +1,50 @@
+"""key fingerprint
+
+Revision ID: 4c1f9a2e7b3d
+Revises: d3796dd75665
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import hashlib
+
+import sqlalchemy as sa
+from cryptography.hazmat.primitives import serialization
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1f9a2e7b3d'
+down_revision: Union[str, None] = 'd3796dd75665'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _fingerprint(public_key_pem: str) -> str:
+    # SHA-256 of the DER SubjectPublicKeyInfo, as computed by the app when this revision was written
+    public_key = serialization.load_pem_public_key(public_key_pem.encode())
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('keys', sa.Column('fingerprint', sa.String(length=64), nullable=True), schema='esign')
+    op.create_index(op.f('ix_esign_keys_fingerprint'), 'keys', ['fingerprint'], unique=True, schema='esign')
+
+    # Backfill fingerprints for existing key pairs
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, public_key FROM esign.keys WHERE fingerprint IS NULL")).fetchall()
+    for key_id, public_key in rows:
+        conn.execute(
+            sa.text("UPDATE esign.keys SET fingerprint = :fingerprint WHERE id = :id"),
+            {"fingerprint": _fingerprint(public_key), "id": key_id}
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_keys_fingerprint'), table_name='keys', schema='esign')
+    op.drop_column('keys', 'fingerprint', schema='esign')
@@ -0,0 +1,35 @@
+"""signature countersign chain
+
+Revision ID: 5d8f1b3e6c27
+Revises: c48e1d7a9f25
+Create Date: 2026-10-17 18:03:12.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f1b3e6c27'
+down_revision: Union[str, None] = 'c48e1d7a9f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signatures', sa.Column('parent_id', sa.UUID(), nullable=True), schema='esign')
+    op.add_column('signatures', sa.Column('chain_index', sa.Integer(), server_default='0', nullable=False), schema='esign')
+    op.create_foreign_key(
+        'signatures_parent_id_fkey', 'signatures', 'signatures', ['parent_id'], ['id'],
+        source_schema='esign', referent_schema='esign', ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_esign_signatures_parent_id'), 'signatures', ['parent_id'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_signatures_parent_id'), table_name='signatures', schema='esign')
+    op.drop_constraint('signatures_parent_id_fkey', 'signatures', schema='esign', type_='foreignkey')
+    op.drop_column('signatures', 'chain_index', schema='esign')
+    op.drop_column('signatures', 'parent_id', schema='esign')
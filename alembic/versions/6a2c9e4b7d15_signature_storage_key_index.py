@@ -0,0 +1,26 @@
+"""signature storage key index
+
+Revision ID: 6a2c9e4b7d15
+Revises: 9b2e4f6a1c83
+Create Date: 2026-10-17 21:42:11.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2c9e4b7d15'
+down_revision: Union[str, None] = '9b2e4f6a1c83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Blob garbage collection looks up which storage keys are still referenced
+    op.create_index(op.f('ix_esign_signatures_storage_key'), 'signatures', ['storage_key'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_signatures_storage_key'), table_name='signatures', schema='esign')
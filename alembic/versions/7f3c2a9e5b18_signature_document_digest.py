@@ -0,0 +1,32 @@
+"""signature document digest
+
+Revision ID: 7f3c2a9e5b18
+Revises: 2b7d4f8e1a36
+Create Date: 2026-10-17 16:42:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3c2a9e5b18'
+down_revision: Union[str, None] = '2b7d4f8e1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signatures', sa.Column('document_digest', sa.String(length=64), nullable=True), schema='esign')
+    op.add_column('signatures', sa.Column('key_fingerprint', sa.String(length=64), nullable=True), schema='esign')
+    op.create_index(op.f('ix_esign_signatures_document_digest'), 'signatures', ['document_digest'], unique=False, schema='esign')
+    op.create_index(op.f('ix_esign_signatures_key_fingerprint'), 'signatures', ['key_fingerprint'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_signatures_key_fingerprint'), table_name='signatures', schema='esign')
+    op.drop_index(op.f('ix_esign_signatures_document_digest'), table_name='signatures', schema='esign')
+    op.drop_column('signatures', 'key_fingerprint', schema='esign')
+    op.drop_column('signatures', 'document_digest', schema='esign')
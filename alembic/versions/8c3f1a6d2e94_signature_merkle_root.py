@@ -0,0 +1,30 @@
+"""signature merkle root
+
+Revision ID: 8c3f1a6d2e94
+Revises: 6a2c9e4b7d15
+Create Date: 2026-10-17 22:17:38.402951
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f1a6d2e94'
+down_revision: Union[str, None] = '6a2c9e4b7d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signatures', sa.Column('merkle_root', sa.String(length=64), nullable=True), schema='esign')
+    op.add_column('signatures', sa.Column('merkle_leaf_count', sa.Integer(), nullable=True), schema='esign')
+    op.create_index(op.f('ix_esign_signatures_merkle_root'), 'signatures', ['merkle_root'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_signatures_merkle_root'), table_name='signatures', schema='esign')
+    op.drop_column('signatures', 'merkle_leaf_count', schema='esign')
+    op.drop_column('signatures', 'merkle_root', schema='esign')
@@ -0,0 +1,34 @@
+"""signature storage path
+
+Revision ID: 8e2d5b0c6a41
+Revises: 4c1f9a2e7b3d
+Create Date: 2026-10-17 10:03:21.582907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d5b0c6a41'
+down_revision: Union[str, None] = '4c1f9a2e7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('signatures', sa.Column('storage_path', sa.Text(), nullable=True), schema='esign')
+    op.alter_column('signatures', 'content',
+               existing_type=sa.LargeBinary(),
+               nullable=True,
+               schema='esign')
+
+
+def downgrade() -> None:
+    op.alter_column('signatures', 'content',
+               existing_type=sa.LargeBinary(),
+               nullable=False,
+               schema='esign')
+    op.drop_column('signatures', 'storage_path', schema='esign')
@@ -0,0 +1,42 @@
+"""upload sessions
+
+Revision ID: 9b2e4f6a1c83
+Revises: 5d8f1b3e6c27
+Create Date: 2026-10-17 19:11:50.932417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e4f6a1c83'
+down_revision: Union[str, None] = '5d8f1b3e6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('filename', sa.Text(), nullable=False),
+    sa.Column('temp_path', sa.Text(), nullable=False),
+    sa.Column('next_chunk', sa.Integer(), nullable=False),
+    sa.Column('bytes_received', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['esign.users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    schema='esign'
+    )
+    op.create_index(op.f('ix_esign_upload_sessions_id'), 'upload_sessions', ['id'], unique=False, schema='esign')
+    op.create_index(op.f('ix_esign_upload_sessions_user_id'), 'upload_sessions', ['user_id'], unique=False, schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_esign_upload_sessions_user_id'), table_name='upload_sessions', schema='esign')
+    op.drop_index(op.f('ix_esign_upload_sessions_id'), table_name='upload_sessions', schema='esign')
+    op.drop_table('upload_sessions', schema='esign')
@@ -0,0 +1,26 @@
+"""envelope key encryption
+
+Revision ID: b57e03d9c2fa
+Revises: 8e2d5b0c6a41
+Create Date: 2026-10-17 11:20:05.104633
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b57e03d9c2fa'
+down_revision: Union[str, None] = '8e2d5b0c6a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('keys', sa.Column('wrapped_data_key', sa.Text(), nullable=True), schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_column('keys', 'wrapped_data_key', schema='esign')
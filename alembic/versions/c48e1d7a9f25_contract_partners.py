@@ -0,0 +1,46 @@
+"""contract partners
+
+Revision ID: c48e1d7a9f25
+Revises: 7f3c2a9e5b18
+Create Date: 2026-10-17 17:20:44.507912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c48e1d7a9f25'
+down_revision: Union[str, None] = '7f3c2a9e5b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('contract_partners',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('partner_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['esign.users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['partner_id'], ['esign.users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'partner_id'),
+    schema='esign'
+    )
+    # Backfill both orientations of every accepted invitation
+    op.execute(
+        """
+        INSERT INTO esign.contract_partners (user_id, partner_id, created_at)
+        SELECT sender_id, receiver_id, COALESCE(responded_at, created_at) FROM esign.contract_invitations
+        WHERE status = 'ACCEPTED'
+        UNION
+        SELECT receiver_id, sender_id, COALESCE(responded_at, created_at) FROM esign.contract_invitations
+        WHERE status = 'ACCEPTED'
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('contract_partners', schema='esign')
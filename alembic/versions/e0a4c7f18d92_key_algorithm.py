@@ -0,0 +1,26 @@
+"""key algorithm
+
+Revision ID: e0a4c7f18d92
+Revises: b57e03d9c2fa
+Create Date: 2026-10-17 13:41:52.660218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0a4c7f18d92'
+down_revision: Union[str, None] = 'b57e03d9c2fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('keys', sa.Column('algorithm', sa.String(), server_default='rsa-2048', nullable=False), schema='esign')
+
+
+def downgrade() -> None:
+    op.drop_column('keys', 'algorithm', schema='esign')
@@ -10,7 +10,9 @@ from sqlalchemy.orm import selectinload
 from database import get_db
 from models.user import User
 from models.contract_invitation import ContractInvitation, InvitationStatus
-from utils.api_auth import get_api_key_user
+from utils.api_auth import get_api_principal
+from utils.api_key_cache import ApiPrincipal
+from utils.partners import add_partners
 
 router = APIRouter(prefix="/invitations", tags=["API - Invitations"])
 
@@ -67,7 +69,7 @@ def invitation_to_response(invitation: ContractInvitation) -> InvitationResponse
 @router.post("/", response_model=InvitationResponse)
 async def create_invitation(
     data: InvitationCreate,
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Send a contract invitation to another user."""
@@ -77,12 +79,12 @@ async def create_invitation(
     if not receiver:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if receiver.id == user.id:
+    if receiver.id == principal.user_id:
         raise HTTPException(status_code=400, detail="Cannot send invitation to yourself")
 
     existing = await db.execute(
         select(ContractInvitation).where(
-            ContractInvitation.sender_id == user.id,
+            ContractInvitation.sender_id == principal.user_id,
             ContractInvitation.receiver_id == receiver.id,
             ContractInvitation.status == InvitationStatus.PENDING
         )
@@ -91,7 +93,7 @@ async def create_invitation(
         raise HTTPException(status_code=400, detail="Pending invitation already exists")
 
     invitation = ContractInvitation(
-        sender_id=user.id,
+        sender_id=principal.user_id,
         receiver_id=receiver.id,
         message=data.message
     )
@@ -110,14 +112,14 @@ async def create_invitation(
 
 @router.get("/", response_model=InvitationListResponse)
 async def list_invitations(
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """List all sent and received invitations."""
     sent_result = await db.execute(
         select(ContractInvitation)
         .options(selectinload(ContractInvitation.sender), selectinload(ContractInvitation.receiver))
-        .where(ContractInvitation.sender_id == user.id)
+        .where(ContractInvitation.sender_id == principal.user_id)
         .order_by(ContractInvitation.created_at.desc())
     )
     sent = [invitation_to_response(inv) for inv in sent_result.scalars().all()]
@@ -125,7 +127,7 @@ async def list_invitations(
     received_result = await db.execute(
         select(ContractInvitation)
         .options(selectinload(ContractInvitation.sender), selectinload(ContractInvitation.receiver))
-        .where(ContractInvitation.receiver_id == user.id)
+        .where(ContractInvitation.receiver_id == principal.user_id)
         .order_by(ContractInvitation.created_at.desc())
     )
     received = [invitation_to_response(inv) for inv in received_result.scalars().all()]
@@ -135,7 +137,7 @@ async def list_invitations(
 
 @router.get("/pending", response_model=List[InvitationResponse])
 async def list_pending_invitations(
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """List pending invitations received by the current user."""
@@ -143,7 +145,7 @@ async def list_pending_invitations(
         select(ContractInvitation)
         .options(selectinload(ContractInvitation.sender), selectinload(ContractInvitation.receiver))
         .where(
-            ContractInvitation.receiver_id == user.id,
+            ContractInvitation.receiver_id == principal.user_id,
             ContractInvitation.status == InvitationStatus.PENDING
         )
         .order_by(ContractInvitation.created_at.desc())
@@ -155,7 +157,7 @@ async def list_pending_invitations(
 @router.post("/{invitation_id}/accept", response_model=InvitationResponse)
 async def accept_invitation(
     invitation_id: uuid.UUID,
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Accept a contract invitation."""
@@ -169,7 +171,7 @@ async def accept_invitation(
     if not invitation:
         raise HTTPException(status_code=404, detail="Invitation not found")
 
-    if invitation.receiver_id != user.id:
+    if invitation.receiver_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to accept this invitation")
 
     if invitation.status != InvitationStatus.PENDING:
@@ -177,6 +179,7 @@ async def accept_invitation(
 
     invitation.status = InvitationStatus.ACCEPTED
     invitation.responded_at = datetime.utcnow()
+    await add_partners(db, invitation.sender_id, invitation.receiver_id)
     await db.commit()
     await db.refresh(invitation)
 
@@ -186,7 +189,7 @@ async def accept_invitation(
 @router.post("/{invitation_id}/reject", response_model=InvitationResponse)
 async def reject_invitation(
     invitation_id: uuid.UUID,
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Reject a contract invitation."""
@@ -200,7 +203,7 @@ async def reject_invitation(
     if not invitation:
         raise HTTPException(status_code=404, detail="Invitation not found")
 
-    if invitation.receiver_id != user.id:
+    if invitation.receiver_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to reject this invitation")
 
     if invitation.status != InvitationStatus.PENDING:
@@ -217,7 +220,7 @@ async def reject_invitation(
 @router.delete("/{invitation_id}")
 async def cancel_invitation(
     invitation_id: uuid.UUID,
-    user: User = Depends(get_api_key_user),
+    principal: ApiPrincipal = Depends(get_api_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Cancel a sent invitation (sender only)."""
@@ -229,7 +232,7 @@ async def cancel_invitation(
     if not invitation:
         raise HTTPException(status_code=404, detail="Invitation not found")
 
-    if invitation.sender_id != user.id:
+    if invitation.sender_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to cancel this invitation")
 
     if invitation.status != InvitationStatus.PENDING:
@@ -1,33 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from models.api_key import ApiKey
 from database import get_db
-from utils.api_auth import store_api_key, get_api_key_user
+from utils.api_auth import store_api_key, get_api_principal
+from utils.api_key_cache import ApiPrincipal, api_key_cache
 
 router = APIRouter(prefix="/keys", tags=["API - Keys"])
 
 
 @router.post("/generate", response_model=dict)
-async def generate_new_api_key(user=Depends(get_api_key_user), session: AsyncSession = Depends(get_db)):
+async def generate_new_api_key(
+        principal: ApiPrincipal = Depends(get_api_principal),
+        session: AsyncSession = Depends(get_db)
+):
     """Generates a new API key, replacing the old one."""
-    await session.execute(select(ApiKey).where(ApiKey.user_id == user.id).delete())
+    await session.execute(delete(ApiKey).where(ApiKey.user_id == principal.user_id))
     await session.commit()
+    await api_key_cache.invalidate_user(principal.user_id)
 
-    new_key = await store_api_key(user.id, session)
+    new_key = await store_api_key(principal.user_id, session, tier=principal.tier)
     return {"api_key": new_key}
 
 
 @router.get("/check", response_model=dict)
-async def check_api_key_status(user=Depends(get_api_key_user)):
+async def check_api_key_status(principal: ApiPrincipal = Depends(get_api_principal)):
     """Check the current user's API key and its tier."""
-    return {"api_key": "Active", "tier": user.api_keys[0].tier}
+    return {"api_key": "Active", "tier": principal.tier}
 
 
 @router.post("/revoke", response_model=dict)
-async def revoke_api_key(user=Depends(get_api_key_user), session: AsyncSession = Depends(get_db)):
+async def revoke_api_key(
+        principal: ApiPrincipal = Depends(get_api_principal),
+        session: AsyncSession = Depends(get_db)
+):
     """Revokes the current API key."""
-    api_key_entry = await session.execute(select(ApiKey).where(ApiKey.user_id == user.id))
+    api_key_entry = await session.execute(select(ApiKey).where(ApiKey.id == principal.key_id))
     api_key_obj = api_key_entry.scalars().first()
 
     if not api_key_obj:
@@ -35,5 +44,6 @@ async def revoke_api_key(user=Depends(get_api_key_user), session: AsyncSession =
 
     api_key_obj.is_active = False
     await session.commit()
+    await api_key_cache.invalidate_user(principal.user_id)
 
-    return {"message": "API key revoked successfully"}
\ No newline at end of file
+    return {"message": "API key revoked successfully"}
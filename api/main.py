@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from api.api_routes import invitation_router, keys_router
+from utils.rate_limit import api_rate_limit
 
-api_router = APIRouter(prefix="/api/v1")
+api_router = APIRouter(prefix="/api/v1", dependencies=[Depends(api_rate_limit)])
 
 api_router.include_router(keys_router)
 api_router.include_router(invitation_router)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import hashlib
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from database import async_session
+from models.keys import KeyPair
+from models.signatures import Signature
+from utils.crypto import SIGNATURE_TRAILER_WINDOW, extract_signature_layers
+from utils.crypto_executor import crypto_executor, verify_digest_async
+from utils.storage import blob_store
+
+
+def _signed_digest(storage_key: str, size: int):
+    """SHA-256 of everything before a stored file's last signature block, or None when it has none."""
+    tail_start = max(size - SIGNATURE_TRAILER_WINDOW, 0)
+    layers = extract_signature_layers(b"".join(blob_store.iter_chunks(storage_key, tail_start, size)))
+    if not layers:
+        return None
+    hasher = hashlib.sha256()
+    for chunk in blob_store.iter_chunks(storage_key, 0, tail_start + layers[-1][0]):
+        hasher.update(chunk)
+    return hasher.digest()
+
+
+async def backfill_batch(batch_size: int, after_id=None):
+    """Records the document digest and signing key of the next batch of legacy signatures after after_id,
+    so verification finds their signer through the digest index.
+
+    Returns (backfilled, skipped ids, last id seen); last id is None once no rows are left.
+    """
+    async with async_session() as session:
+        query = (
+            select(Signature, KeyPair)
+            .join(KeyPair, KeyPair.user_id == Signature.user_id)
+            .where(Signature.document_digest.is_(None))
+            .where(Signature.storage_key.isnot(None))
+        )
+        if after_id is not None:
+            query = query.where(Signature.id > after_id)
+        result = await session.execute(query.order_by(Signature.id).limit(batch_size))
+        rows = result.all()
+        if not rows:
+            return 0, [], None
+
+        backfilled = 0
+        skipped = []
+        for signed_entry, key_pair in rows:
+            try:
+                document_digest = await run_in_threadpool(
+                    _signed_digest, signed_entry.storage_key, signed_entry.content_size
+                )
+            except OSError as e:
+                print(f"Skipping signature {signed_entry.id}: {e}")
+                skipped.append(signed_entry.id)
+                continue
+            # Legacy blocks carry no key id; only record the key if it really made this signature
+            if document_digest is None or not (await verify_digest_async(
+                document_digest, signed_entry.signature, key_pair.public_key, key_pair.id
+            )).get("verified"):
+                print(f"Skipping signature {signed_entry.id}: not verifiable with its owner's key")
+                skipped.append(signed_entry.id)
+                continue
+            signed_entry.document_digest = document_digest.hex()
+            signed_entry.key_fingerprint = key_pair.fingerprint
+            backfilled += 1
+
+        await session.commit()
+        return backfilled, skipped, rows[-1][0].id
+
+
+async def backfill(batch_size: int):
+    total = 0
+    skipped = []
+    last_id = None
+    while True:
+        backfilled, batch_skipped, last_id = await backfill_batch(batch_size, last_id)
+        if last_id is None:
+            break
+        total += backfilled
+        skipped.extend(batch_skipped)
+        print(f"Backfilled {total} signatures so far, {len(skipped)} skipped")
+    print(f"Done, {total} signatures backfilled")
+    if skipped:
+        print(f"{len(skipped)} signatures could not be backfilled and still need the legacy key scan:")
+        for signature_id in skipped:
+            print(f"  {signature_id}")
+    crypto_executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Record document digests for signatures made before the digest index. "
+                    "Run migrate_signature_blobs.py first; rows still outside the blob store are not read."
+    )
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size))
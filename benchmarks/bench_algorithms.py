@@ -0,0 +1,56 @@
+"""Per-algorithm keygen, sign and verify throughput on representative document sizes.
+
+Run from the repository root: python -m benchmarks.bench_algorithms
+"""
+import argparse
+import os
+import time
+
+from utils.crypto import SIGNING_ALGORITHMS, generate_key_pair, load_private_key, load_public_key, \
+    hash_document, sign_digest, verify_digest
+
+DOCUMENT_SIZES = {"4 KB": 4 * 1024, "256 KB": 256 * 1024, "8 MB": 8 * 1024 * 1024}
+
+
+def _rate(fn, min_seconds: float) -> float:
+    """Calls fn repeatedly for at least min_seconds and returns calls per second."""
+    calls = 0
+    started_at = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_seconds:
+            return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0, help="Minimum time spent per measurement")
+    args = parser.parse_args()
+
+    documents = {label: os.urandom(size) for label, size in DOCUMENT_SIZES.items()}
+
+    print(f"{'algorithm':<12} {'keygen/s':>10} {'pub bytes':>10} {'sig bytes':>10}  "
+          + "  ".join(f"{'sign/s ' + label:>16} {'verify/s ' + label:>18}" for label in documents))
+    for algorithm in SIGNING_ALGORITHMS:
+        keygen_rate = _rate(lambda: generate_key_pair(algorithm), args.seconds)
+        public_pem, private_pem = generate_key_pair(algorithm)
+        private_key, public_key = load_private_key(private_pem), load_public_key(public_pem)
+        signature = sign_digest(hash_document(b""), private_key)
+
+        columns = []
+        for document in documents.values():
+            # Hashing is part of every request, so it is included in both rates
+            sign_rate = _rate(lambda: sign_digest(hash_document(document), private_key), args.seconds)
+            document_signature = sign_digest(hash_document(document), private_key)
+            verify_rate = _rate(
+                lambda: verify_digest(hash_document(document), document_signature, public_key), args.seconds
+            )
+            columns.append(f"{sign_rate:>16.1f} {verify_rate:>18.1f}")
+
+        print(f"{algorithm:<12} {keygen_rate:>10.1f} {len(public_pem):>10} {len(signature):>10}  " + "  ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
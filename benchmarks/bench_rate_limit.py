@@ -0,0 +1,77 @@
+"""Per-request overhead of the /api/v1 tier limiter, and the cost of one reconciliation pass.
+
+Run from the repository root: python -m benchmarks.bench_rate_limit [--requests 1000000]
+The TTLCache-backed TokenBucketLimiter used for logins is measured alongside for comparison.
+Sync is timed against an in-process counter map, so it shows the limiter's own work only; a
+deployed worker adds one Redis pipeline round trip per API_RATE_LIMIT_SYNC_BATCH busy keys and
+yields to the event loop between batches, so "batch ms" is roughly how long the loop is held.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from utils.rate_limit import API_RATE_LIMIT_SYNC_BATCH, TierRateLimiter, TokenBucketLimiter, parse_tier_limits
+
+KEY_COUNTS = (1, 1_000, 100_000)
+
+
+class _InProcessCounters:
+    """Stands in for the shared store's increment_counters."""
+
+    def __init__(self):
+        self.counters = {}
+
+    async def increment_counters(self, deltas: dict, ttl: float):
+        for key, delta in deltas.items():
+            self.counters[key] = self.counters.get(key, 0) + delta
+        return {key: self.counters[key] for key in deltas}
+
+
+def _ns_per_call(fn, keys, requests: int) -> float:
+    key_count = len(keys)
+    started_at = time.perf_counter()
+    for i in range(requests):
+        fn(keys[i % key_count])
+    return (time.perf_counter() - started_at) / requests * 1e9
+
+
+async def _ns_per_local_bucket_call(limiter: TokenBucketLimiter, keys, requests: int) -> float:
+    key_count = len(keys)
+    started_at = time.perf_counter()
+    for i in range(requests):
+        await limiter.take(keys[i % key_count])
+    return (time.perf_counter() - started_at) / requests * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # Generous limits so every call takes the allowed path, which is the common case
+    limits = parse_tier_limits("starter:1000000/1000000")
+    print(f"{'keys':>8} {'tier take ns':>14} {'login bucket ns':>16} {'sync ms':>10} {'batch ms':>10}")
+    for key_count in KEY_COUNTS:
+        keys = [uuid.uuid4() for _ in range(key_count)]
+
+        tier_limiter = TierRateLimiter(limits, "starter", 1, _InProcessCounters())
+        take_ns = _ns_per_call(lambda key: tier_limiter.take(key, "starter"), keys, args.requests)
+
+        login_limiter = TokenBucketLimiter("bench", 1_000_000, 1_000_000)
+        bucket_ns = asyncio.run(_ns_per_local_bucket_call(login_limiter, [str(key) for key in keys], args.requests))
+
+        # Every key has unsynced usage, the worst case for one pass
+        asyncio.run(tier_limiter.sync())
+        for key in keys:
+            tier_limiter.take(key, "starter")
+        started_at = time.perf_counter()
+        asyncio.run(tier_limiter.sync())
+        sync_ms = (time.perf_counter() - started_at) * 1000
+        batches = -(-key_count // API_RATE_LIMIT_SYNC_BATCH)
+
+        print(f"{key_count:>8} {take_ns:>14.0f} {bucket_ns:>16.0f} {sync_ms:>10.2f} {sync_ms / batches:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
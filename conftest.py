@@ -0,0 +1 @@
+# Lets pytest import the application packages (utils, routers, ...) from the repository root.
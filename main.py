@@ -1,10 +1,43 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from routers import auth, protected, sign, profile, invitation
+from routers import auth, protected, sign, upload, profile, invitation
 from api import api_router
+from utils.api_key_cache import api_key_cache
+from utils.auth import verified_tokens
+from utils.blob_gc import blob_sweeper
+from utils.crypto_executor import crypto_executor, password_executor
+from utils import key_cache, rate_limit
+from utils.key_pool import key_pool
+from utils.key_store import load_key_encryption_key
+from utils.merkle_batcher import merkle_batcher
+from utils.shared_store import shared_store
+from utils.verification_cache import verification_cache
 
-app = FastAPI(title="eSign API", version="1.0.0", description="A FastAPI-based eSign system")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail at startup, not on the first register or sign call, when the KEK is missing or malformed
+    load_key_encryption_key()
+    key_pool.start()
+    api_key_cache.start()
+    rate_limit.api_rate_limiter.start()
+    upload.upload_sweeper.start()
+    blob_sweeper.start()
+    yield
+    await blob_sweeper.stop()
+    await upload.upload_sweeper.stop()
+    await rate_limit.api_rate_limiter.stop()
+    await api_key_cache.stop()
+    await key_pool.stop()
+    crypto_executor.shutdown()
+    password_executor.shutdown()
+    if shared_store is not None:
+        await shared_store.close()
+
+
+app = FastAPI(title="eSign API", version="1.0.0", description="A FastAPI-based eSign system", lifespan=lifespan)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +54,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(protected.router, prefix="/protected", tags=["Protected"])
 app.include_router(sign.router, prefix="/sign", tags=["Signing"])
+app.include_router(upload.router, prefix="/sign/uploads", tags=["Signing"])
 app.include_router(profile.router, prefix="/user", tags=["User Profile"])
 app.include_router(invitation.router, prefix="/invitations", tags=["Invitations"])
 
@@ -31,4 +65,23 @@ app.include_router(api_router)
 @app.get("/", tags=["Health"])
 def health_check():
     logger.info("Health check requested")
-    return {"message": "eSign API is up and running"}
\ No newline at end of file
+    return {"message": "eSign API is up and running"}
+
+
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    return {
+        "crypto_executor": crypto_executor.stats(),
+        "password_executor": password_executor.stats(),
+        # Parsed-key caches in process mode live in the executor's worker processes
+        "key_cache": {**key_cache.stats(), "executor_workers": crypto_executor.worker_key_cache_stats()},
+        "key_pool": key_pool.stats(),
+        "verification_cache": verification_cache.stats(),
+        "api_key_cache": api_key_cache.stats(),
+        "verified_tokens": verified_tokens.stats(),
+        "rate_limits": rate_limit.stats(),
+        "merkle_batcher": merkle_batcher.stats(),
+        "upload_writers": upload.upload_writers.stats(),
+        "upload_sweeper": upload.upload_sweeper.stats(),
+        "blob_sweeper": blob_sweeper.stats(),
+    }
\ No newline at end of file
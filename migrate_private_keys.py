@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+from sqlalchemy.future import select
+
+from database import async_session
+from models.keys import KeyPair
+from models.user import User
+from utils.crypto_executor import crypto_executor
+from utils.key_store import generate_key_encryption_key_file, load_private_key_pem, seal_private_key, \
+    KEY_ENCRYPTION_KEY_FILE
+
+
+async def migrate_batch(batch_size: int, after_id=None):
+    """Moves the next batch of legacy PBKDF2-encrypted keys after after_id to the envelope scheme.
+
+    Returns (migrated, skipped ids, last id seen); last id is None once no rows are left. Paging by id
+    means rows that fail stay behind the cursor instead of being selected again.
+    """
+    async with async_session() as session:
+        query = (
+            select(KeyPair, User)
+            .join(User, User.id == KeyPair.user_id)
+            .where(KeyPair.wrapped_data_key.is_(None))
+        )
+        if after_id is not None:
+            query = query.where(KeyPair.id > after_id)
+        result = await session.execute(
+            query
+            .order_by(KeyPair.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=KeyPair)
+        )
+        rows = result.all()
+        if not rows:
+            return 0, [], None
+
+        # The PBKDF2 derivations run in parallel on the crypto executor
+        pems = await asyncio.gather(
+            *(load_private_key_pem(key_pair, user) for key_pair, user in rows),
+            return_exceptions=True
+        )
+
+        migrated = 0
+        skipped = []
+        for (key_pair, _), pem in zip(rows, pems):
+            if isinstance(pem, Exception):
+                print(f"Skipping key pair {key_pair.id}: {pem}")
+                skipped.append(key_pair.id)
+                continue
+            seal_private_key(key_pair, pem)
+            migrated += 1
+
+        await session.commit()
+        return migrated, skipped, rows[-1][0].id
+
+
+async def migrate(batch_size: int):
+    total = 0
+    skipped = []
+    last_id = None
+    while True:
+        migrated, batch_skipped, last_id = await migrate_batch(batch_size, last_id)
+        if last_id is None:
+            break
+        total += migrated
+        skipped.extend(batch_skipped)
+        print(f"Migrated {total} key pairs so far, {len(skipped)} skipped")
+    print(f"Done, {total} key pairs migrated")
+    if skipped:
+        print(f"{len(skipped)} key pairs could not be decrypted and are still on the legacy scheme:")
+        for key_pair_id in skipped:
+            print(f"  {key_pair_id}")
+    crypto_executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encrypt legacy private keys with envelope encryption.")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--generate-kek", action="store_true", help=f"Create {KEY_ENCRYPTION_KEY_FILE} and exit")
+    args = parser.parse_args()
+
+    if args.generate_kek:
+        generate_key_encryption_key_file()
+        print(f"Key-encryption key written to {KEY_ENCRYPTION_KEY_FILE}")
+    else:
+        asyncio.run(migrate(args.batch_size))
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+from sqlalchemy import or_
+from sqlalchemy.future import select
+from sqlalchemy.orm import undefer
+from starlette.concurrency import run_in_threadpool
+
+from database import async_session
+from models.signatures import Signature
+from utils.storage import STREAM_CHUNK_SIZE, blob_store
+
+
+def _copy_file_to_store(path: str):
+    writer = blob_store.writer()
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(STREAM_CHUNK_SIZE):
+                writer.write(chunk)
+        return writer.hexdigest(), writer.size, blob_store.commit(writer)
+    except Exception:
+        writer.discard()
+        raise
+
+
+async def migrate_batch(batch_size: int, after_id=None):
+    """Moves the next batch of signed documents after after_id from the content column or per-row files
+    into the blob store. Returns (migrated, skipped ids, last id seen); last id is None once no rows are left.
+    """
+    async with async_session() as session:
+        query = (
+            select(Signature)
+            .options(undefer(Signature.content))
+            .where(Signature.storage_key.is_(None))
+            .where(or_(Signature.content.isnot(None), Signature.storage_path.isnot(None)))
+        )
+        if after_id is not None:
+            # Paging by id keeps rows that could not be moved from being selected again
+            query = query.where(Signature.id > after_id)
+        result = await session.execute(
+            query
+            .order_by(Signature.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.scalars().all()
+        if not rows:
+            return 0, [], None
+
+        migrated = 0
+        skipped = []
+        old_paths = []
+        for signed_entry in rows:
+            try:
+                if signed_entry.storage_path:
+                    stored = await run_in_threadpool(_copy_file_to_store, signed_entry.storage_path)
+                    old_paths.append(signed_entry.storage_path)
+                else:
+                    stored = await run_in_threadpool(blob_store.put_bytes, signed_entry.content)
+            except OSError as e:
+                print(f"Skipping signature {signed_entry.id}: {e}")
+                skipped.append(signed_entry.id)
+                continue
+            signed_entry.content_digest, signed_entry.content_size, signed_entry.storage_key = stored
+            signed_entry.content = None
+            signed_entry.storage_path = None
+            migrated += 1
+
+        await session.commit()
+
+    # Old files are removed only once the rows pointing at the store are committed
+    for path in old_paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return migrated, skipped, rows[-1].id
+
+
+async def migrate(batch_size: int):
+    total = 0
+    skipped = []
+    last_id = None
+    while True:
+        migrated, batch_skipped, last_id = await migrate_batch(batch_size, last_id)
+        if last_id is None:
+            break
+        total += migrated
+        skipped.extend(batch_skipped)
+        print(f"Moved {total} signed documents so far, {len(skipped)} skipped")
+    print(f"Done, {total} signed documents moved to the blob store")
+    if skipped:
+        print(f"{len(skipped)} signatures could not be moved and still keep their bytes in place:")
+        for signature_id in skipped:
+            print(f"  {signature_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move signed document bytes into the content-addressed blob store.")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size))
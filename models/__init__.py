@@ -7,3 +7,5 @@ from models.signatures import Signature
 from models.user import User
 from models.contracts import Contracts
 from models.contract_invitation import ContractInvitation
+from models.contract_partner import ContractPartner
+from models.upload_session import UploadSession
@@ -0,0 +1,17 @@
+# models/contract_partner.py
+from sqlalchemy import Column, ForeignKey, TIMESTAMP, func
+from sqlalchemy.dialects.postgresql import UUID
+from models.base import Base, POSTGRESQL_SCHEMA
+
+
+class ContractPartner(Base):
+    """Symmetric partner edge, stored in both orientations so lookups from either side hit the primary key.
+
+    Rows are written when an invitation is accepted and disappear with either user via ON DELETE CASCADE.
+    """
+    __tablename__ = "contract_partners"
+    __table_args__ = {"schema": POSTGRESQL_SCHEMA}
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("esign.users.id", ondelete="CASCADE"), primary_key=True)
+    partner_id = Column(UUID(as_uuid=True), ForeignKey("esign.users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
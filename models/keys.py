@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Text, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, String, Text, ForeignKey, TIMESTAMP, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from models.base import Base, POSTGRESQL_SCHEMA
@@ -12,6 +12,9 @@ class KeyPair(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("esign.users.id", ondelete="CASCADE"), unique=True, nullable=False)
     public_key = Column(Text, nullable=False)  # Changed from String to Text
     private_key = Column(Text, nullable=False)  # Changed from String to Text
+    wrapped_data_key = Column(Text, nullable=True)  # Envelope scheme; null for legacy PBKDF2-encrypted keys
+    fingerprint = Column(String(64), unique=True, index=True, nullable=True)  # SHA-256 of the public key
+    algorithm = Column(String, nullable=False, default="rsa-2048", server_default="rsa-2048")
     created_at = Column(TIMESTAMP, server_default=func.now())  # Added timestamp
 
     user = relationship("User", back_populates="key_pair")
@@ -1,7 +1,7 @@
 import uuid
-from sqlalchemy import Column, Text, ForeignKey, LargeBinary, TIMESTAMP, func
+from sqlalchemy import Column, String, Text, ForeignKey, LargeBinary, BigInteger, Boolean, Integer, TIMESTAMP, func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from models.base import Base, POSTGRESQL_SCHEMA
 
 class Signature(Base):
@@ -12,7 +12,24 @@ class Signature(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("esign.users.id", ondelete="CASCADE"), nullable=False, index=True)
     filename = Column(Text, nullable=False)
     signature = Column(Text, nullable=False)  # Changed from String to Text
-    content = Column(LargeBinary, nullable=False)
+    # Legacy locations of the signed file; migrate_signature_blobs.py moves both into the blob store
+    content = deferred(Column(LargeBinary, nullable=True))
+    storage_path = Column(Text, nullable=True)
+    content_digest = Column(String(64), nullable=True, index=True)  # SHA-256 of the signed file
+    content_size = Column(BigInteger, nullable=True)
+    storage_key = Column(Text, nullable=True, index=True)
+    # SHA-256 of the original document and the signing key, so verification can find its signer directly
+    document_digest = Column(String(64), nullable=True, index=True)
+    key_fingerprint = Column(String(64), nullable=True, index=True)
+    # Countersignatures store only their block; the container is the chain of blobs from the root down.
+    # Deleting an account keeps other users' countersignatures, so a chain_index > 0 row whose parent_id
+    # is NULL belongs to a container that can no longer be assembled.
+    parent_id = Column(UUID(as_uuid=True), ForeignKey("esign.signatures.id", ondelete="SET NULL"), nullable=True, index=True)
+    chain_index = Column(Integer, nullable=False, default=0, server_default="0")  # 0 for the original signature
+    detached = Column(Boolean, nullable=False, default=False, server_default="false")  # Blob is a JSON manifest
+    # Set on rows recording a Merkle batch root; document_digest then holds the signed root message
+    merkle_root = Column(String(64), nullable=True, index=True)
+    merkle_leaf_count = Column(Integer, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.now())  # Added timestamp
 
     user = relationship("User", back_populates="signatures")
@@ -0,0 +1,19 @@
+import uuid
+from sqlalchemy import Column, Text, Integer, BigInteger, ForeignKey, TIMESTAMP, func
+from sqlalchemy.dialects.postgresql import UUID
+from models.base import Base, POSTGRESQL_SCHEMA
+
+
+class UploadSession(Base):
+    """A resumable chunked upload. Bytes accumulate in a blob-store temp file until finalize signs them."""
+    __tablename__ = "upload_sessions"
+    __table_args__ = {"schema": POSTGRESQL_SCHEMA}
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("esign.users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(Text, nullable=False)
+    temp_path = Column(Text, nullable=False)
+    next_chunk = Column(Integer, nullable=False, default=0)
+    bytes_received = Column(BigInteger, nullable=False, default=0)  # Bytes past this in temp_path are discarded
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
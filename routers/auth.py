@@ -12,8 +12,12 @@ from models.keys import KeyPair
 from models.user import User
 from schemas.user import UserCreate, UserResponse, KeyRetrieveResponse, KeyRetrieveRequest, UserLogin, \
     GoogleLoginRequest
-from utils.auth import hash_password, create_access_token, verify_password, get_current_user
-from utils.crypto import generate_rsa_key_pair, encrypt_private_key, decrypt_private_key, generate_encryption_key
+from utils.auth import create_access_token, get_current_user_record
+from utils.crypto import public_key_fingerprint, SIGNING_ALGORITHMS
+from utils.crypto_executor import hash_password_async, verify_password_async
+from utils.key_pool import key_pool
+from utils.rate_limit import login_email_limiter, password_ip_limiter, rate_limit
+from utils.key_store import seal_private_key, load_private_key_pem
 from dotenv import load_dotenv
 import os
 
@@ -21,6 +25,7 @@ load_dotenv()
 router = APIRouter()
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+DEFAULT_SIGNING_ALGORITHM = os.getenv("DEFAULT_SIGNING_ALGORITHM", "rsa-2048")
 
 
 async def get_user_by_email(email: str, db: AsyncSession):
@@ -61,7 +66,8 @@ async def google_login(data: GoogleLoginRequest, db: AsyncSession = Depends(get_
     }
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(rate_limit(password_ip_limiter))])
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
     # Check if user exists
@@ -71,28 +77,41 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
 
-    # ✅ Generate PBKDF2 Salt (store this)
-    encryption_salt = os.urandom(16)
+    algorithm = user_data.signing_algorithm or DEFAULT_SIGNING_ALGORITHM
+    if algorithm not in SIGNING_ALGORITHMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported signing algorithm, choose one of: {', '.join(SIGNING_ALGORITHMS)}"
+        )
+
+    # Everything that can fail (hashing, key generation, sealing under the KEK) runs before anything
+    # is written, and the user and key pair are committed together, so a failed registration
+    # never leaves a user without a key pair who can't register again
+    hashed_password = await hash_password_async(user_data.password)  # For login
+    public_key, private_key = await key_pool.acquire(algorithm)
 
     new_user = User(
+        id=uuid.uuid4(),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone=user_data.phone,
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),  # For login
-        encryption_salt=encryption_salt,  # Store only the salt!
+        hashed_password=hashed_password,
     )
+    key_pair = KeyPair(
+        user_id=new_user.id,
+        public_key=public_key,
+        fingerprint=public_key_fingerprint(public_key),
+        algorithm=algorithm
+    )
+    try:
+        seal_private_key(key_pair, private_key)
+    except RuntimeError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Key storage is not configured")
 
     db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
-
-    public_key, private_key = generate_rsa_key_pair()
-
-    encrypted_private_key = encrypt_private_key(private_key, new_user.hashed_password, encryption_salt)
-
-
-    key_pair = KeyPair(user_id=new_user.id, public_key=public_key, private_key=encrypted_private_key)
+    # Flush inserts the user first for the key pair's foreign key; both commit in one transaction
+    await db.flush()
     db.add(key_pair)
     await db.commit()
 
@@ -103,44 +122,41 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/retrieve_keys", response_model=KeyRetrieveResponse)
 async def retrieve_keys(
-        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
         db: AsyncSession = Depends(get_db)
 ):
-    """Retrieves a user's keys without requiring a password input. Uses stored PBKDF2 key."""
-
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    """Retrieves a user's keys without requiring a password input."""
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user_id))
+    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user.id))
     key_pair = key_result.scalars().first()
 
     if not key_pair:
         raise HTTPException(status_code=404, detail="Key pair not found")
 
     try:
-        # ✅ Decrypt private key using stored PBKDF2 key
-        decrypted_private_key = decrypt_private_key(key_pair.private_key, user.hashed_password, user.encryption_salt)
-
+        decrypted_private_key = await load_private_key_pem(key_pair, user)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(status_code=400, detail="Decryption failed due to incorrect key")
 
     return KeyRetrieveResponse(
         public_key=key_pair.public_key,
-        private_key=decrypted_private_key.decode()
+        private_key=decrypted_private_key
     )
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit(password_ip_limiter))])
 async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Handles user login and returns JWT access token."""
 
+    # Per account as well as per IP, so a botnet spread over many addresses can't hammer one user
+    await login_email_limiter.check(user_data.email.strip().lower())
+
     result = await db.execute(select(User).where(User.email == user_data.email))
     user = result.scalars().first()
 
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not user or not await verify_password_async(user_data.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials")
 
     access_token = create_access_token(data={"sub": str(user.id)})
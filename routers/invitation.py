@@ -10,7 +10,9 @@ from sqlalchemy.orm import selectinload
 from database import get_db
 from models.user import User
 from models.contract_invitation import ContractInvitation, InvitationStatus
+from models.contract_partner import ContractPartner
 from utils.auth import get_current_user
+from utils.partners import add_partners
 
 router = APIRouter()
 
@@ -44,6 +46,13 @@ class InvitationListResponse(BaseModel):
     received: List[InvitationResponse]
 
 
+class PartnerResponse(BaseModel):
+    id: uuid.UUID
+    name: str
+    email: str
+    since: Optional[datetime]
+
+
 # --- Helper ---
 
 def invitation_to_response(invitation: ContractInvitation) -> InvitationResponse:
@@ -157,6 +166,24 @@ async def list_pending_invitations(
     return invitations
 
 
+@router.get("/partners", response_model=List[PartnerResponse])
+async def list_partners(
+    user_id: uuid.UUID = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """List the users the current user has an accepted contract relationship with."""
+    result = await db.execute(
+        select(User, ContractPartner.created_at)
+        .join(ContractPartner, ContractPartner.partner_id == User.id)
+        .where(ContractPartner.user_id == user_id)
+        .order_by(ContractPartner.created_at.desc())
+    )
+    return [
+        PartnerResponse(id=partner.id, name=f"{partner.first_name} {partner.last_name}", email=partner.email, since=since)
+        for partner, since in result.all()
+    ]
+
+
 @router.post("/{invitation_id}/accept", response_model=InvitationResponse)
 async def accept_invitation(
     invitation_id: uuid.UUID,
@@ -182,6 +209,7 @@ async def accept_invitation(
 
     invitation.status = InvitationStatus.ACCEPTED
     invitation.responded_at = datetime.utcnow()
+    await add_partners(db, invitation.sender_id, invitation.receiver_id)
     await db.commit()
     await db.refresh(invitation)
 
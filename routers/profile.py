@@ -8,7 +8,15 @@ from sqlalchemy.future import select
 from database import get_db
 from models.user import User
 from models.keys import KeyPair
-from utils.auth import get_current_user, hash_password, verify_password
+from models.signatures import Signature
+from utils.auth import get_current_user_record
+from utils.crypto_executor import hash_password_async, verify_password_async
+from utils.key_store import load_private_key_pem, seal_private_key
+from utils.api_key_cache import api_key_cache
+from utils.blob_gc import release_blobs
+from utils.key_cache import invalidate_key_pair
+from utils.rate_limit import password_ip_limiter, rate_limit
+from utils.verification_cache import verification_cache
 
 router = APIRouter()
 
@@ -38,17 +46,11 @@ class ProfileDeleteRequest(BaseModel):
 
 @router.get("/profile", response_model=ProfileResponse)
 async def get_profile(
-    user_id: uuid.UUID = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """Get the current user's profile."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user_id))
+    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user.id))
     has_key_pair = key_result.scalars().first() is not None
 
     return ProfileResponse(
@@ -61,37 +63,43 @@ async def get_profile(
     )
 
 
-@router.put("/profile", response_model=ProfileResponse)
+@router.put("/profile", response_model=ProfileResponse,
+            dependencies=[Depends(rate_limit(password_ip_limiter))])
 async def update_profile(
     profile_data: ProfileUpdate,
-    user_id: uuid.UUID = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """Update the current user's profile."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     if profile_data.first_name is not None:
         user.first_name = profile_data.first_name
     if profile_data.last_name is not None:
         user.last_name = profile_data.last_name
     if profile_data.phone is not None:
         phone_check = await db.execute(
-            select(User).where(User.phone == profile_data.phone, User.id != user_id)
+            select(User).where(User.phone == profile_data.phone, User.id != user.id)
         )
         if phone_check.scalars().first():
             raise HTTPException(status_code=400, detail="Phone number already in use")
         user.phone = profile_data.phone
     if profile_data.password is not None:
-        user.hashed_password = hash_password(profile_data.password)
+        key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user.id))
+        key_pair = key_result.scalars().first()
+        if key_pair and not key_pair.wrapped_data_key:
+            # Legacy keys are encrypted under the password hash; move them to the envelope scheme
+            # before the hash changes, otherwise they become unreadable.
+            try:
+                seal_private_key(key_pair, await load_private_key_pem(key_pair, user))
+            except HTTPException:
+                raise
+            except Exception:
+                raise HTTPException(status_code=400, detail="Could not re-encrypt private key")
+        user.hashed_password = await hash_password_async(profile_data.password)
 
     await db.commit()
     await db.refresh(user)
 
-    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user_id))
+    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user.id))
     has_key_pair = key_result.scalars().first() is not None
 
     return ProfileResponse(
@@ -104,23 +112,30 @@ async def update_profile(
     )
 
 
-@router.delete("/profile")
+@router.delete("/profile", dependencies=[Depends(rate_limit(password_ip_limiter))])
 async def delete_account(
     delete_request: ProfileDeleteRequest,
-    user_id: uuid.UUID = Depends(get_current_user),
+    user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete the current user's account."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if not verify_password(delete_request.password, user.hashed_password):
+    if not await verify_password_async(delete_request.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Password is incorrect")
 
+    key_result = await db.execute(select(KeyPair.id).where(KeyPair.user_id == user.id))
+    key_pair_id = key_result.scalars().first()
+    blob_result = await db.execute(select(Signature.storage_key).where(Signature.user_id == user.id).distinct())
+    storage_keys = blob_result.scalars().all()
+
     await db.delete(user)
     await db.commit()
+    # Signatures go with the user; their documents stay stored only while another row shares them
+    await release_blobs(db, storage_keys)
+
+    # API keys go with the user (ON DELETE CASCADE)
+    await api_key_cache.invalidate_user(user.id)
+    if key_pair_id is not None:
+        invalidate_key_pair(key_pair_id)
+        await verification_cache.invalidate_key_pair(key_pair_id)
 
     return {"message": "Account deleted successfully"}
\ No newline at end of file
@@ -1,99 +1,577 @@
+import asyncio
+import hashlib
+import hmac
+import json
 import mimetypes
+import os
 import uuid
+import zipfile
+from contextlib import nullcontext
+from datetime import datetime, timezone
 from enum import Enum
+from functools import partial
+from typing import List, NamedTuple
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Response
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import or_
-from starlette.responses import JSONResponse
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, FileResponse, StreamingResponse
 
 from database import get_db
 from models import User
-from models.contract_invitation import ContractInvitation, InvitationStatus
-from utils.auth import get_current_user
-from utils.crypto import decrypt_private_key, sign_document, verify_signature, extract_signature
+from schemas.sign import DigestSignRequest, DigestVerifyRequest, MerkleVerifyRequest
+from utils import merkle
+from utils.auth import get_current_user, get_current_user_record
+from utils.blob_gc import release_blobs
+from utils.crypto import extract_signature, hash_document, build_signature_block, public_key_fingerprint, \
+    build_signature_manifest, parse_signature_manifest, extract_signature_layers, SignatureBlock, RSA_2048, \
+    MAX_SIGNATURE_BLOCKS
+from utils.crypto_executor import crypto_executor, sign_digest_async, sign_digests_async, verify_digest_async
+from utils.downloads import blob_download_response
+from utils.key_store import load_private_key_pem
+from utils.merkle_batcher import merkle_batcher
+from utils.partners import are_partners, partners_among
+from utils.verification_cache import VerifiedSigner, verification_cache
+from utils.storage import STREAM_CHUNK_SIZE, BlobWriter, blob_store, upload_buffer
 from models.keys import KeyPair
 from models.signatures import Signature
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
+# Upper bound on keys trial-verified for legacy signature blocks that carry no key id and no recorded digest
+LEGACY_VERIFY_KEY_LIMIT = int(os.getenv("LEGACY_VERIFY_KEY_LIMIT", "500"))
+BATCH_SIGN_MAX_FILES = int(os.getenv("BATCH_SIGN_MAX_FILES", "500"))
+BATCH_VERIFY_MAX_FILES = int(os.getenv("BATCH_VERIFY_MAX_FILES", "500"))
+# Uncompressed limits for batch documents, so a small ZIP cannot expand to fill the disk
+BATCH_SIGN_MAX_FILE_SIZE = int(os.getenv("BATCH_SIGN_MAX_FILE_SIZE", str(256 * 1024 * 1024)))
+BATCH_SIGN_MAX_TOTAL_SIZE = int(os.getenv("BATCH_SIGN_MAX_TOTAL_SIZE", str(1024 * 1024 * 1024)))
+
 
 class VerificationStatus(str, Enum):
     GREEN = "green"  # Valid + in contract relationship
     YELLOW = "yellow"  # Valid but not in contract relationship
     RED = "red"  # Invalid signature
+    ERROR = "error"  # The document could not be read, so nothing was verified
+
+
+async def legacy_candidate_keys(db: AsyncSession):
+    """Keys tried for blocks without a key id that the digest index does not resolve: the RSA keys of users
+    who still own signatures backfill_signature_digests.py has not recorded, at most LEGACY_VERIFY_KEY_LIMIT.
+    Empty once the backfill has run, as every signature made here is then found by its digest."""
+    unrecorded_owners = select(Signature.user_id).where(Signature.key_fingerprint.is_(None))
+    legacy_keys = await db.execute(
+        select(KeyPair)
+        .where(KeyPair.algorithm == RSA_2048, KeyPair.user_id.in_(unrecorded_owners))
+        .order_by(KeyPair.created_at)
+        .limit(LEGACY_VERIFY_KEY_LIMIT)
+    )
+    return legacy_keys.scalars().all()
+
+
+async def digest_candidate_keys(db: AsyncSession, document_digests: set) -> dict:
+    """Maps hex document digests to the keys that signed them here, via the Signature.document_digest index."""
+    candidates = {}
+    if not document_digests:
+        return candidates
+    result = await db.execute(
+        select(Signature.document_digest, KeyPair)
+        .join(KeyPair, KeyPair.fingerprint == Signature.key_fingerprint)
+        .where(Signature.document_digest.in_(document_digests))
+    )
+    for document_digest, key_pair in result.all():
+        # The same document may have been signed more than once with one key
+        digest_candidates = candidates.setdefault(document_digest, [])
+        if key_pair not in digest_candidates:
+            digest_candidates.append(key_pair)
+    return candidates
+
+
+async def resolve_signer(document_digest: bytes, block: SignatureBlock, db: AsyncSession):
+    """Returns the KeyPair whose key verifies the signature block over the document digest, or None."""
+    if block.key_id:
+        # Key id present: one indexed lookup and a single verification
+        key_result = await db.execute(select(KeyPair).where(KeyPair.fingerprint == block.key_id))
+        key_pair = key_result.scalars().first()
+        # The block names its algorithm, so a mismatch with the stored key is a failure, not a retry
+        if key_pair and block.algorithm in (None, key_pair.algorithm) and (await verify_digest_async(
+            document_digest, block.signature, key_pair.public_key, key_pair.id
+        )).get("verified"):
+            return key_pair
+        return None
+
+    # No key id: try the keys that signed this exact document here before the bounded legacy scan
+    candidates = await digest_candidate_keys(db, {document_digest.hex()})
+    for key_pair in candidates.get(document_digest.hex(), []):
+        if (await verify_digest_async(
+            document_digest, block.signature, key_pair.public_key, key_pair.id
+        )).get("verified"):
+            return key_pair
+
+    for key_pair in await legacy_candidate_keys(db):
+        if (await verify_digest_async(
+            document_digest, block.signature, key_pair.public_key, key_pair.id
+        )).get("verified"):
+            return key_pair
+    return None
+
+
+def _hash_and_write(hasher, writer: BlobWriter, chunk: bytes):
+    hasher.update(chunk)
+    writer.write(chunk)
+
+
+async def stream_signed_file(file: UploadFile, private_key_pem: str, key_pair: KeyPair):
+    """Hashes the upload chunk by chunk while writing it to the blob store, then appends the signature block.
+
+    Returns (document_digest, signature, content_digest, content_size, storage_key).
+    """
+    document_hasher = hashlib.sha256()
+    writer = await run_in_threadpool(blob_store.writer)
+    try:
+        while chunk := await file.read(STREAM_CHUNK_SIZE):
+            await run_in_threadpool(_hash_and_write, document_hasher, writer, chunk)
+
+        document_digest = document_hasher.digest()
+        signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+        storage_key = await run_in_threadpool(
+            blob_store.commit_with_trailer, writer, build_signature_block(signature, key_pair.fingerprint, key_pair.algorithm)
+        )
+    except Exception:
+        await run_in_threadpool(writer.discard)
+        raise
+    return document_digest, signature, writer.hexdigest(), writer.size, storage_key
+
+
+async def load_signing_key(user: User, db: AsyncSession):
+    """Loads the user's key pair and decrypted private key PEM, raising 404/400 like the sign endpoints."""
+    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user.id))
+    key_pair = key_result.scalars().first()
+
+    if not key_pair:
+        raise HTTPException(status_code=404, detail="Key pair not found")
+
+    try:
+        private_key_pem = await load_private_key_pem(key_pair, user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Decryption failed: {str(e)}")
+
+    if not key_pair.fingerprint:
+        key_pair.fingerprint = public_key_fingerprint(key_pair.public_key)
+
+    return key_pair, private_key_pem
 
 
 @router.post("/signDownload")
 async def sign_and_download(
+        request: Request,
         file: UploadFile = File(...),
+        stream: bool = Query(False, description="Hash and store the upload in chunks instead of in memory"),
         user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
         db: AsyncSession = Depends(get_db)
 ):
     """Signs a document without requiring the user to provide their password manually."""
+    key_pair, private_key_pem = await load_signing_key(user, db)
 
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalars().first()
+    signed_filename = f"signed_{file.filename}"
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if stream:
+        try:
+            document_digest, signature, content_digest, content_size, storage_key = await stream_signed_file(
+                file, private_key_pem, key_pair
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except OSError:
+            raise HTTPException(status_code=400, detail="Failed to read file")
+    else:
+        try:
+            file_content = await file.read()
+        except Exception:
+            raise HTTPException(status_code=400, detail="Failed to read file")
 
-    key_result = await db.execute(select(KeyPair).where(KeyPair.user_id == user_id))
-    key_pair = key_result.scalars().first()
+        document_digest = await run_in_threadpool(hash_document, file_content)
+        try:
+            signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        signed_content = file_content + build_signature_block(signature, key_pair.fingerprint, key_pair.algorithm)
+        content_digest, content_size, storage_key = await run_in_threadpool(blob_store.put_bytes, signed_content)
+
+    signed_entry = Signature(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        filename=signed_filename,
+        signature=signature,
+        content_digest=content_digest,
+        content_size=content_size,
+        storage_key=storage_key,
+        document_digest=document_digest.hex(),
+        key_fingerprint=key_pair.fingerprint
+    )
+    db.add(signed_entry)
+    await db.commit()
+
+    return JSONResponse(
+        content={
+            "signature_id": str(signed_entry.id),
+            "filename": signed_filename,
+            "signature": signature,
+            "download_url": str(request.url_for("download_signed_file", signature_id=signed_entry.id))
+        }
+    )
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=detail)
+
+
+def _expand_batch(files: List[UploadFile]):
+    """Flattens uploads into (filename, opener, size) triples, expanding ZIP archives into their members.
+
+    Counts and declared sizes are checked here, before anything is extracted; _store_and_hash then holds
+    each document to its size, as a ZIP header can understate what a member inflates to.
+    """
+    items = []
+    total_size = 0
+    for upload in files:
+        if upload.filename and upload.filename.lower().endswith(".zip"):
+            archive = zipfile.ZipFile(upload.file)
+            members = [info for info in archive.infolist() if not info.is_dir()]
+        else:
+            upload.file.seek(0)
+            members = [upload]
+        if len(items) + len(members) > BATCH_SIGN_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"At most {BATCH_SIGN_MAX_FILES} documents per batch")
+        for member in members:
+            if isinstance(member, zipfile.ZipInfo):
+                item = (os.path.basename(member.filename), partial(archive.open, member), member.file_size)
+            else:
+                item = (member.filename, partial(nullcontext, member.file), member.size)
+            if item[2] is not None and item[2] > BATCH_SIGN_MAX_FILE_SIZE:
+                raise _too_large(f"{item[0]} exceeds {BATCH_SIGN_MAX_FILE_SIZE} bytes")
+            total_size += item[2] or 0
+            if total_size > BATCH_SIGN_MAX_TOTAL_SIZE:
+                raise _too_large(f"Batch documents exceed {BATCH_SIGN_MAX_TOTAL_SIZE} bytes in total")
+            items.append(item)
+    return items
 
-    if not key_pair:
-        raise HTTPException(status_code=404, detail="Key pair not found")
 
+def _store_and_hash(opener, size_limit: int):
+    """Copies one batch document into a blob writer while hashing it. Runs in a worker thread.
+
+    Returns (writer, document_digest); the writer is closed until the signature block is appended.
+    Raises 413 once more than size_limit bytes have been read.
+    """
+    hasher = hashlib.sha256()
+    writer = blob_store.writer()
     try:
-        file_content = await file.read()
+        with opener() as source:
+            while chunk := source.read(STREAM_CHUNK_SIZE):
+                if writer.size + len(chunk) > size_limit:
+                    raise _too_large(f"A batch document inflates past {size_limit} bytes")
+                _hash_and_write(hasher, writer, chunk)
     except Exception:
-        raise HTTPException(status_code=400, detail="Failed to read file")
+        writer.discard()
+        raise
+    writer.close()
+    return writer, hasher.digest()
+
+
+@router.post("/signBatch")
+async def sign_batch(
+        request: Request,
+        files: List[UploadFile] = File(..., description="Documents to sign; .zip uploads are expanded"),
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """Signs many documents with a single key unwrap, hashing and signing them in parallel."""
+    key_pair, private_key_pem = await load_signing_key(user, db)
 
     try:
-        private_key_pem = decrypt_private_key(key_pair.private_key, user.hashed_password, user.encryption_salt)
+        items = await run_in_threadpool(_expand_batch, files)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No documents to sign")
+
+    # hashlib releases the GIL on large buffers, so these threads hash on separate cores
+    spooled = await asyncio.gather(
+        *(run_in_threadpool(_store_and_hash, opener, min(size, BATCH_SIGN_MAX_FILE_SIZE)
+                            if size is not None else BATCH_SIGN_MAX_FILE_SIZE)
+          for _, opener, size in items),
+        return_exceptions=True
+    )
+    stored = [i for i, item in enumerate(spooled) if not isinstance(item, Exception)]
+    # Everything is still in temp files here; nothing is committed to the store unless the whole batch fits
+    too_large = next((item for item in spooled if isinstance(item, HTTPException)), None)
+    if too_large is not None:
+        for i in stored:
+            await run_in_threadpool(spooled[i][0].discard)
+        raise too_large
+
+    try:
+        signatures = await sign_digests_async([spooled[i][1] for i in stored], private_key_pem, key_pair.id)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Decryption failed: {str(e)}")
+        for i in stored:
+            await run_in_threadpool(spooled[i][0].discard)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=400, detail=str(e))
 
-    signature = sign_document(file_content, private_key_pem.decode())
+    storage_keys = await asyncio.gather(*(
+        run_in_threadpool(
+            blob_store.commit_with_trailer, spooled[i][0],
+            build_signature_block(signature, key_pair.fingerprint, key_pair.algorithm)
+        )
+        for i, signature in zip(stored, signatures)
+    ), return_exceptions=True)
+    if any(isinstance(storage_key, Exception) for storage_key in storage_keys):
+        for i in stored:
+            await run_in_threadpool(spooled[i][0].discard)
+        # Blobs committed just now are kept through the delete grace period; the blob sweeper removes them
+        await release_blobs(db, [key for key in storage_keys if not isinstance(key, Exception)])
+        raise HTTPException(status_code=500, detail="Failed to store signed documents")
 
-    signed_filename = f"signed_{file.filename}"
-    signed_content = file_content + b"\n\n--- SIGNATURE START ---\n" + signature.encode() + b"\n--- SIGNATURE END ---"
+    results = [
+        {"filename": f"signed_{filename}", "status": "error", "error": "Failed to read file"}
+        for filename, _, _ in items
+    ]
+    rows = []
+    for i, signature, storage_key in zip(stored, signatures, storage_keys):
+        signed_filename = f"signed_{items[i][0]}"
+        writer = spooled[i][0]
+        signature_id = uuid.uuid4()
+        rows.append({
+            "id": signature_id,
+            "user_id": user_id,
+            "filename": signed_filename,
+            "signature": signature,
+            "content_digest": writer.hexdigest(),
+            "content_size": writer.size,
+            "storage_key": storage_key,
+            "document_digest": spooled[i][1].hex(),
+            "key_fingerprint": key_pair.fingerprint,
+        })
+        results[i] = {
+            "filename": signed_filename,
+            "status": "signed",
+            "signature": signature,
+            "download_url": str(request.url_for("download_signed_file", signature_id=signature_id))
+        }
+
+    if rows:
+        # One multi-row INSERT for the whole batch
+        await db.execute(insert(Signature), rows)
+    await db.commit()
+
+    return JSONResponse(content={"signed": len(rows), "failed": len(items) - len(rows), "results": results})
+
+
+@router.post("/countersign/{signature_id}")
+async def countersign(
+        signature_id: uuid.UUID,
+        request: Request,
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Adds the current user's signature to a signed document, producing a multi-signature container.
+
+    The new block signs the document digest stored with the original signature, so the document
+    is neither re-uploaded nor re-hashed; only the block itself is stored. Countersigning the
+    returned signature id again extends the same container.
+    """
+    parent = await db.get(Signature, signature_id)
+    if not parent:
+        raise HTTPException(status_code=404, detail="Signature not found")
+    if parent.detached or not parent.storage_key or not parent.document_digest:
+        raise HTTPException(status_code=400, detail="Only documents signed with an attached signature can be countersigned")
+
+    chain = await signature_chain(db, parent)
+    if len(chain) >= MAX_SIGNATURE_BLOCKS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SIGNATURE_BLOCKS} signatures per document")
+
+    key_pair, private_key_pem = await load_signing_key(user, db)
+    if key_pair.fingerprint in {row.key_fingerprint for row in chain}:
+        raise HTTPException(status_code=400, detail="You have already signed this document")
+
+    document_digest = bytes.fromhex(parent.document_digest)
+    try:
+        signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    block = build_signature_block(signature, key_pair.fingerprint, key_pair.algorithm)
+    content_digest, content_size, storage_key = await run_in_threadpool(blob_store.put_bytes, block)
 
     signed_entry = Signature(
+        id=uuid.uuid4(),
         user_id=user_id,
-        filename=signed_filename,
+        filename=chain[0].filename,
         signature=signature,
-        content=signed_content
+        content_digest=content_digest,
+        content_size=content_size,
+        storage_key=storage_key,
+        document_digest=parent.document_digest,
+        key_fingerprint=key_pair.fingerprint,
+        parent_id=parent.id,
+        chain_index=len(chain)
     )
     db.add(signed_entry)
     await db.commit()
 
     return JSONResponse(
         content={
-            "filename": signed_filename,
+            "signature_id": str(signed_entry.id),
+            "filename": signed_entry.filename,
             "signature": signature,
-            "download_url": f"http://localhost:8000/sign/download/{signed_filename}"
+            "signature_count": len(chain) + 1,
+            "download_url": str(request.url_for("download_signed_file", signature_id=signed_entry.id))
         }
     )
 
 
+async def signature_chain(db: AsyncSession, signed_entry: Signature) -> list:
+    """Returns a multi-signature container's rows, from the root signature down to signed_entry.
+
+    Raises 410 when an earlier signature was deleted with its signer's account, taking the document with it.
+    """
+    chain = [signed_entry]
+    while chain[-1].chain_index > 0 and len(chain) < MAX_SIGNATURE_BLOCKS:
+        parent = await db.get(Signature, chain[-1].parent_id) if chain[-1].parent_id is not None else None
+        if parent is None:
+            raise HTTPException(status_code=410, detail="An earlier signature on this document was deleted, "
+                                                        "so the signed document is no longer available")
+        chain.append(parent)
+    chain.reverse()
+    return chain
+
+
+def _media_type(filename: str) -> str:
+    mime_type, _ = mimetypes.guess_type(filename)
+    return mime_type or "application/octet-stream"
+
+
+async def _signed_file_response(request: Request, signed_entry: Signature, db: AsyncSession) -> Response:
+    filename = signed_entry.filename
+    if signed_entry.storage_key:
+        if signed_entry.chain_index == 0:
+            segments, etag_value = [(signed_entry.storage_key, signed_entry.content_size)], signed_entry.content_digest
+        else:
+            chain = await signature_chain(db, signed_entry)
+            segments = [(row.storage_key, row.content_size) for row in chain]
+            # Every countersignature has its own id, so this container never changes either
+            etag_value = hashlib.sha256("".join(row.content_digest for row in chain).encode()).hexdigest()
+        return blob_download_response(request, segments, etag_value, filename, _media_type(filename))
+
+    # Rows not yet moved by migrate_signature_blobs.py
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if signed_entry.storage_path:
+        return FileResponse(signed_entry.storage_path, media_type=_media_type(filename), headers=headers)
+
+    content_result = await db.execute(select(Signature.content).where(Signature.id == signed_entry.id))
+    return Response(content=content_result.scalar(), media_type=_media_type(filename), headers=headers)
+
+
+@router.get("/files/{signature_id}")
+async def download_signed_file(signature_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """Downloads a signed file by signature id, with Range and conditional GET support."""
+    signed_entry = await db.get(Signature, signature_id)
+    if not signed_entry:
+        raise HTTPException(status_code=404, detail="File not found")
+    return await _signed_file_response(request, signed_entry, db)
+
+
+@router.get("/files/by-digest/{content_digest}")
+async def download_signed_file_by_digest(content_digest: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Downloads a signed file by the SHA-256 of its signed bytes."""
+    result = await db.execute(select(Signature).where(Signature.content_digest == content_digest.lower()).limit(1))
+    signed_entry = result.scalars().first()
+    if not signed_entry:
+        raise HTTPException(status_code=404, detail="File not found")
+    return await _signed_file_response(request, signed_entry, db)
+
+
 @router.get("/download/{filename}")
-async def download_file(filename: str, db: AsyncSession = Depends(get_db)):
+async def download_file(filename: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Legacy filename-addressed download; prefer /sign/files/{signature_id}."""
     result = await db.execute(select(Signature).where(Signature.filename == filename))
     signed_entry = result.scalars().first()
     if not signed_entry:
         raise HTTPException(status_code=404, detail="File not found")
+    return await _signed_file_response(request, signed_entry, db)
 
-    mime_type, _ = mimetypes.guess_type(filename)
-    if mime_type is None:
-        mime_type = "application/octet-stream"
 
-    return Response(
-        content=signed_entry.content,
-        media_type=mime_type,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+async def signer_verdict(document_digest: bytes, block: SignatureBlock, user_id: uuid.UUID, db: AsyncSession):
+    """Resolves the signer of a digest and rates the result for the verifying user.
+
+    Which key verified the signature is cached; the relationship with the verifier is always checked live.
+    """
+    signer = await verification_cache.get(document_digest, block)
+    signer_user = await db.get(User, signer.user_id) if signer is not None else None
+    if signer is not None and signer_user is None:
+        # Signer deleted, possibly through another worker: drop the stale result and resolve again
+        await verification_cache.invalidate_key_pair(signer.key_pair_id)
+        signer = None
+
+    if signer is None:
+        key_pair = await resolve_signer(document_digest, block, db)
+        if key_pair is None:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "status": VerificationStatus.RED,
+                    "message": "Invalid signature - no matching signer found",
+                    "verified": False
+                }
+            )
+        signer = VerifiedSigner(key_pair.user_id, key_pair.id)
+        await verification_cache.put(document_digest, block, signer)
+        signer_user = await db.get(User, signer.user_id)
+
+    signer_id = signer.user_id
+    signer_name = f"{signer_user.first_name} {signer_user.last_name}" if signer_user else "Unknown"
+
+    # If verifier is the signer, green
+    if signer_id == user_id:
+        return JSONResponse(
+            content={
+                "status": VerificationStatus.GREEN,
+                "message": "Signature is valid - this is your signature",
+                "verified": True,
+                "signer": signer_name
+            }
+        )
+
+    # Check for accepted contract relationship between verifier and signer
+    has_relationship = await are_partners(db, user_id, signer_id)
+
+    if has_relationship:
+        return JSONResponse(
+            content={
+                "status": VerificationStatus.GREEN,
+                "message": "Signature is valid - signed by your contract partner",
+                "verified": True,
+                "signer": signer_name
+            }
+        )
+    else:
+        return JSONResponse(
+            content={
+                "status": VerificationStatus.YELLOW,
+                "message": "Signature is valid but you have no contract relationship with the signer",
+                "verified": True,
+                "signer": signer_name
+            }
+        )
 
 
 @router.post("/verify_signature")
@@ -111,13 +589,11 @@ async def verify_signed_file(
     - RED: Invalid or no signature
     """
     try:
-        file_content = await file.read()
-    except Exception:
+        document_digest, block = await run_in_threadpool(_read_extract_and_hash, file)
+    except OSError:
         raise HTTPException(status_code=400, detail="Failed to read file")
 
-    original_content, signature = extract_signature(file_content)
-
-    if not original_content or not signature:
+    if document_digest is None:
         return JSONResponse(
             status_code=400,
             content={
@@ -127,72 +603,467 @@ async def verify_signed_file(
             }
         )
 
-    # Find the signer by checking all public keys
-    all_keys = await db.execute(select(KeyPair))
-    key_pairs = all_keys.scalars().all()
+    return await signer_verdict(document_digest, block, user_id, db)
+
+
+def _hash_upload(upload: UploadFile) -> bytes:
+    upload.file.seek(0)
+    return hashlib.file_digest(upload.file, "sha256").digest()
+
+
+async def _store_signature_manifest(request: Request, user_id: uuid.UUID, key_pair: KeyPair, document_digest: bytes,
+                                    signature: str, filename: str, db: AsyncSession):
+    """Stores a detached signature manifest and returns the response describing it."""
+    manifest = build_signature_manifest(
+        document_digest, signature, key_pair.fingerprint, key_pair.algorithm, datetime.now(timezone.utc), filename
+    )
+    content_digest, content_size, storage_key = await run_in_threadpool(blob_store.put_bytes, manifest)
+
+    signed_entry = Signature(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        filename=f"{filename}.sig",
+        signature=signature,
+        content_digest=content_digest,
+        content_size=content_size,
+        storage_key=storage_key,
+        document_digest=document_digest.hex(),
+        key_fingerprint=key_pair.fingerprint,
+        detached=True
+    )
+    db.add(signed_entry)
+    await db.commit()
+
+    return JSONResponse(
+        content={
+            "filename": signed_entry.filename,
+            "manifest": json.loads(manifest),
+            "download_url": str(request.url_for("download_signed_file", signature_id=signed_entry.id))
+        }
+    )
+
 
-    signer_id = None
-    for key_pair in key_pairs:
-        result = verify_signature(original_content, signature, key_pair.public_key)
-        if result.get("verified"):
-            signer_id = key_pair.user_id
-            break
+@router.post("/signDetached")
+async def sign_detached(
+        request: Request,
+        file: UploadFile = File(...),
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """Signs a document without storing it; only a small JSON signature manifest is kept."""
+    key_pair, private_key_pem = await load_signing_key(user, db)
+
+    try:
+        document_digest = await run_in_threadpool(_hash_upload, file)
+    except OSError:
+        raise HTTPException(status_code=400, detail="Failed to read file")
+
+    try:
+        signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _store_signature_manifest(request, user_id, key_pair, document_digest, signature, file.filename, db)
 
-    if not signer_id:
+
+@router.post("/verifyDetached")
+async def verify_detached(
+        file: UploadFile = File(..., description="The original, unmodified document"),
+        manifest: UploadFile = File(..., description="The .sig manifest returned by /sign/signDetached"),
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Verifies a document against a detached signature manifest. Statuses match /sign/verify_signature."""
+    try:
+        manifest_bytes = await manifest.read()
+        document_digest = await run_in_threadpool(_hash_upload, file)
+    except OSError:
+        raise HTTPException(status_code=400, detail="Failed to read file")
+
+    signed_digest, block = parse_signature_manifest(manifest_bytes)
+    # Manifests always name their key; trying every key is left to legacy embedded blocks
+    if signed_digest is None or not block.signature or not block.key_id:
         return JSONResponse(
             status_code=400,
             content={
                 "status": VerificationStatus.RED,
-                "message": "Invalid signature - no matching signer found",
+                "message": "Invalid signature manifest",
                 "verified": False
             }
         )
 
-    # Get signer info
-    signer_result = await db.execute(select(User).where(User.id == signer_id))
-    signer = signer_result.scalars().first()
-    signer_name = f"{signer.first_name} {signer.last_name}" if signer else "Unknown"
-
-    # If verifier is the signer, green
-    if signer_id == user_id:
+    if not hmac.compare_digest(signed_digest, document_digest):
         return JSONResponse(
+            status_code=400,
             content={
-                "status": VerificationStatus.GREEN,
-                "message": "Signature is valid - this is your signature",
-                "verified": True,
-                "signer": signer_name
+                "status": VerificationStatus.RED,
+                "message": "Document does not match the signature manifest",
+                "verified": False
             }
         )
 
-    # Check for accepted contract relationship between verifier and signer
-    contract_result = await db.execute(
-        select(ContractInvitation).where(
-            ContractInvitation.status == InvitationStatus.ACCEPTED,
-            or_(
-                # Verifier sent invitation to signer
-                (ContractInvitation.sender_id == user_id) & (ContractInvitation.receiver_id == signer_id),
-                # Signer sent invitation to verifier
-                (ContractInvitation.sender_id == signer_id) & (ContractInvitation.receiver_id == user_id)
-            )
-        )
+    return await signer_verdict(document_digest, block, user_id, db)
+
+
+@router.post("/signDigest")
+async def sign_digest_only(
+        request: DigestSignRequest,
+        http_request: Request,
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """Signs a client-computed SHA-256 digest, so the document itself is never uploaded."""
+    key_pair, private_key_pem = await load_signing_key(user, db)
+    document_digest = bytes.fromhex(request.digest)
+
+    try:
+        signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await _store_signature_manifest(
+        http_request, user_id, key_pair, document_digest, signature, request.filename or request.digest.lower(), db
     )
-    has_relationship = contract_result.scalars().first() is not None
 
-    if has_relationship:
+
+@router.post("/verifyDigest")
+async def verify_digest_only(
+        request: DigestVerifyRequest,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Verifies a signature over a client-computed SHA-256 digest. Statuses match /sign/verify_signature."""
+    block = SignatureBlock(signature=request.signature, key_id=request.key_id, algorithm=request.algorithm)
+    return await signer_verdict(bytes.fromhex(request.digest), block, user_id, db)
+
+
+@router.post("/signMerkle")
+async def sign_merkle(
+        request: DigestSignRequest,
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Signs a client-computed SHA-256 digest as part of a Merkle batch.
+
+    Digests arriving for the same key within a short window share one signed Merkle root; each
+    document gets back that root signature plus its inclusion proof for /sign/verifyMerkle. The root
+    is recorded once in the signer's history, with signature_id pointing at it.
+    """
+    key_pair, private_key_pem = await load_signing_key(user, db)
+    document_digest = bytes.fromhex(request.digest)
+
+    try:
+        receipt = await merkle_batcher.submit(key_pair, private_key_pem, document_digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(
+        content={
+            "signature_id": str(receipt.signature_id),
+            "digest": request.digest.lower(),
+            "filename": request.filename,
+            "leaf_index": receipt.leaf_index,
+            "batch_size": receipt.batch_size,
+            "root": receipt.root.hex(),
+            "root_signature": receipt.root_signature,
+            "key_id": key_pair.fingerprint,
+            "algorithm": key_pair.algorithm,
+            "proof": [{"side": side, "hash": sibling.hex()} for side, sibling in receipt.proof]
+        }
+    )
+
+
+@router.post("/verifyMerkle")
+async def verify_merkle(
+        request: MerkleVerifyRequest,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Verifies a document digest against a Merkle inclusion proof and the signed root. Statuses match
+    /sign/verify_signature."""
+    proof = [(step.side, bytes.fromhex(step.hash)) for step in request.proof]
+    root = bytes.fromhex(request.root)
+    if not hmac.compare_digest(merkle.root_from_proof(bytes.fromhex(request.digest), proof), root):
         return JSONResponse(
+            status_code=400,
             content={
-                "status": VerificationStatus.GREEN,
-                "message": "Signature is valid - signed by your contract partner",
-                "verified": True,
-                "signer": signer_name
+                "status": VerificationStatus.RED,
+                "message": "Document is not included in the signed batch",
+                "verified": False
             }
         )
+
+    block = SignatureBlock(signature=request.root_signature, key_id=request.key_id, algorithm=request.algorithm)
+    return await signer_verdict(merkle.root_message(root), block, user_id, db)
+
+
+def _read_extract_and_hash(upload: UploadFile):
+    """Returns (document_digest, SignatureBlock) for one upload, or (None, None). Runs in a worker thread."""
+    with upload_buffer(upload) as buffer:
+        original_content, block = extract_signature(buffer)
+        if original_content is None:
+            return None, None
+        with original_content:
+            if not original_content or not block.signature:
+                return None, None
+            return hash_document(original_content), block
+
+
+class VerificationContext(NamedTuple):
+    """Everything needed to check many (digest, block) pairs, each part loaded with a single query."""
+    cached_signers: dict  # item index -> VerifiedSigner
+    key_pairs: dict  # fingerprint -> KeyPair
+    digest_keys: dict  # hex document digest -> [KeyPair]
+    legacy_keys: list
+    signers: dict  # user id -> User
+    partner_ids: set
+
+
+async def load_verification_context(db: AsyncSession, user_id: uuid.UUID, items: list) -> VerificationContext:
+    """items is a list of (document_digest, SignatureBlock), with (None, None) for unsigned documents."""
+    lookups = {
+        index: verification_cache.get(document_digest, block)
+        for index, (document_digest, block) in enumerate(items) if document_digest is not None
+    }
+    cached_signers = dict(zip(lookups, await asyncio.gather(*lookups.values())))
+    cached_signers = {index: signer for index, signer in cached_signers.items() if signer is not None}
+    # Only documents without a cached result need their candidate keys loaded
+    uncached = [(document_digest, block) for index, (document_digest, block) in enumerate(items)
+                if block is not None and index not in cached_signers]
+
+    key_ids = {block.key_id for _, block in uncached if block.key_id}
+    key_pairs = {}
+    if key_ids:
+        key_result = await db.execute(select(KeyPair).where(KeyPair.fingerprint.in_(key_ids)))
+        key_pairs = {key_pair.fingerprint: key_pair for key_pair in key_result.scalars().all()}
+
+    digest_keys = {}
+    legacy_keys = []
+    unkeyed_digests = {document_digest.hex() for document_digest, block in uncached if not block.key_id}
+    if unkeyed_digests:
+        digest_keys = await digest_candidate_keys(db, unkeyed_digests)
+        # Only needed until legacy signatures are backfilled; digest candidates are tried first
+        legacy_keys = await legacy_candidate_keys(db)
+
+    # Blocks without a key id may resolve to any candidate, so their owners are loaded too
+    candidate_user_ids = {key_pair.user_id for key_pair in key_pairs.values()} | \
+                         {key_pair.user_id for key_pairs_for_digest in digest_keys.values()
+                          for key_pair in key_pairs_for_digest} | \
+                         {key_pair.user_id for key_pair in legacy_keys} | \
+                         {signer.user_id for signer in cached_signers.values()}
+    signers = {}
+    partner_ids = set()
+    if candidate_user_ids:
+        signer_result = await db.execute(select(User).where(User.id.in_(candidate_user_ids)))
+        signers = {signer.id: signer for signer in signer_result.scalars().all()}
+
+        partner_ids = await partners_among(db, user_id, candidate_user_ids)
+
+    for index, signer in list(cached_signers.items()):
+        if signer.user_id not in signers:
+            # Signer deleted, possibly through another worker: resolve this document again
+            await verification_cache.invalidate_key_pair(signer.key_pair_id)
+            del cached_signers[index]
+
+    return VerificationContext(cached_signers, key_pairs, digest_keys, legacy_keys, signers, partner_ids)
+
+
+async def _verify_item(index: int, document_digest, block, context: VerificationContext, limiter: asyncio.Semaphore):
+    """Resolves the signer of one item; returns (index, VerifiedSigner, None) or (index, None, error)."""
+    if document_digest is None:
+        return index, None, None
+    cached_signer = context.cached_signers.get(index)
+    if cached_signer is not None:
+        return index, cached_signer, None
+    async with limiter:
+        try:
+            key_pair = await _find_verifying_key(
+                document_digest, block, context.key_pairs, context.digest_keys, context.legacy_keys
+            )
+        except HTTPException as e:
+            return index, None, e.detail
+    if key_pair is None:
+        return index, None, None
+    signer = VerifiedSigner(key_pair.user_id, key_pair.id)
+    await verification_cache.put(document_digest, block, signer)
+    return index, signer, None
+
+
+async def _find_verifying_key(document_digest, block, key_pairs: dict, digest_keys: dict, legacy_keys):
+    if block.key_id:
+        key_pair = key_pairs.get(block.key_id)
+        if key_pair and key_pair.algorithm == block.algorithm and (await verify_digest_async(
+            document_digest, block.signature, key_pair.public_key, key_pair.id
+        )).get("verified"):
+            return key_pair
+        return None
+
+    for key_pair in digest_keys.get(document_digest.hex(), []) + list(legacy_keys):
+        if (await verify_digest_async(
+            document_digest, block.signature, key_pair.public_key, key_pair.id
+        )).get("verified"):
+            return key_pair
+    return None
+
+
+def _rate_signer(signer: VerifiedSigner, error, user_id: uuid.UUID, context: VerificationContext) -> dict:
+    if error is not None:
+        return {"status": VerificationStatus.RED, "message": error, "verified": False}
+    if signer is None:
+        return {"status": VerificationStatus.RED, "message": "Invalid signature - no matching signer found",
+                "verified": False}
+
+    signer_user = context.signers.get(signer.user_id)
+    signer_name = f"{signer_user.first_name} {signer_user.last_name}" if signer_user else "Unknown"
+    if signer.user_id == user_id:
+        status, message = VerificationStatus.GREEN, "Signature is valid - this is your signature"
+    elif signer.user_id in context.partner_ids:
+        status, message = VerificationStatus.GREEN, "Signature is valid - signed by your contract partner"
     else:
+        status = VerificationStatus.YELLOW
+        message = "Signature is valid but you have no contract relationship with the signer"
+    return {"status": status, "message": message, "verified": True, "signer": signer_name}
+
+
+def _verification_limiter() -> asyncio.Semaphore:
+    # Stay well inside the executor's pending budget so other requests are not rejected
+    return asyncio.Semaphore(crypto_executor.max_workers * 2)
+
+
+@router.post("/verifyBatch")
+async def verify_batch(
+        files: List[UploadFile] = File(...),
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Verify many signed documents, streaming one NDJSON line per file as soon as it is checked.
+
+    Signer keys, signer profiles and contract relationships are each resolved with a single
+    query for the whole batch before streaming starts; the signature checks run in parallel.
+    Files that cannot be read get status "error" rather than being reported as unsigned.
+    """
+    if len(files) > BATCH_VERIFY_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_VERIFY_MAX_FILES} documents per batch")
+
+    extracted = await asyncio.gather(
+        *(run_in_threadpool(_read_extract_and_hash, upload) for upload in files),
+        return_exceptions=True
+    )
+    unreadable = {index for index, item in enumerate(extracted) if isinstance(item, Exception)}
+    extracted = [(None, None) if index in unreadable else item for index, item in enumerate(extracted)]
+    context = await load_verification_context(db, user_id, extracted)
+
+    async def results():
+        limiter = _verification_limiter()
+        pending = [
+            _verify_item(index, document_digest, block, context, limiter)
+            for index, (document_digest, block) in enumerate(extracted)
+        ]
+        for finished in asyncio.as_completed(pending):
+            index, signer, error = await finished
+            if index in unreadable:
+                line = {"status": VerificationStatus.ERROR, "message": "Failed to read file", "verified": False}
+            elif extracted[index][0] is None:
+                line = {"status": VerificationStatus.RED, "message": "No signature found in the document",
+                        "verified": False}
+            else:
+                line = _rate_signer(signer, error, user_id, context)
+            line = {"filename": files[index].filename, **line, "index": index}
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _read_extract_all_and_hash(upload: UploadFile):
+    """Returns (document_digest, [SignatureBlock, ...], [prefix digest, ...]) for a multi-signature container.
+    Runs in a worker thread.
+
+    Countersigned blocks sign the document digest. A block added by signing an already signed file
+    through /sign/signDownload signs everything before it instead, so each block also gets the digest
+    of the bytes preceding it.
+    """
+    with upload_buffer(upload) as buffer:
+        layers = extract_signature_layers(buffer)
+        if not layers or layers[0][0] == 0:
+            return None, [], []
+        with memoryview(buffer) as content:
+            # One pass over the file serves every signer
+            hasher = hashlib.sha256()
+            digests = []
+            hashed = 0
+            for content_end, _ in layers:
+                with content[hashed:content_end] as part:
+                    hasher.update(part)
+                hashed = content_end
+                digests.append(hasher.digest())
+        signed = [(block, digest) for (_, block), digest in zip(layers, digests) if block.signature]
+        return digests[0], [block for block, _ in signed], [digest for _, digest in signed]
+
+
+@router.post("/verifyMulti")
+async def verify_multi_signature(
+        file: UploadFile = File(...),
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Verify every signature in a multi-signature container.
+
+    The document is hashed once and all signatures are checked in parallel. Each signature gets
+    the same GREEN/YELLOW/RED rating as /sign/verify_signature; verified is true only when all are valid.
+    Files signed again through /sign/signDownload instead of countersigned are accepted too: a block
+    that does not verify over the document is checked over everything before it.
+    """
+    try:
+        document_digest, blocks, prefix_digests = await run_in_threadpool(_read_extract_all_and_hash, file)
+    except OSError:
+        raise HTTPException(status_code=400, detail="Failed to read file")
+
+    if document_digest is None or not blocks:
         return JSONResponse(
+            status_code=400,
             content={
-                "status": VerificationStatus.YELLOW,
-                "message": "Signature is valid but you have no contract relationship with the signer",
-                "verified": True,
-                "signer": signer_name
+                "status": VerificationStatus.RED,
+                "message": "No signature found in the document",
+                "verified": False
             }
-        )
\ No newline at end of file
+        )
+
+    items = [(document_digest, block) for block in blocks]
+    context = await load_verification_context(db, user_id, items)
+    limiter = _verification_limiter()
+    verified = await asyncio.gather(*(
+        _verify_item(index, document_digest, block, context, limiter) for index, (_, block) in enumerate(items)
+    ))
+    contexts = [context] * len(items)
+
+    # Blocks that fail over the document may have been added by re-signing the signed file
+    resigned = [index for index, signer, error in verified
+                if signer is None and error is None and prefix_digests[index] != document_digest]
+    if resigned:
+        resigned_items = [(prefix_digests[index], blocks[index]) for index in resigned]
+        resigned_context = await load_verification_context(db, user_id, resigned_items)
+        for index, (_, signer, error) in zip(resigned, await asyncio.gather(*(
+            _verify_item(i, prefix_digest, block, resigned_context, limiter)
+            for i, (prefix_digest, block) in enumerate(resigned_items)
+        ))):
+            verified[index] = (index, signer, error)
+            contexts[index] = resigned_context
+
+    signatures = [
+        {"index": index, "key_id": blocks[index].key_id, "algorithm": blocks[index].algorithm,
+         **_rate_signer(signer, error, user_id, contexts[index])}
+        for index, signer, error in verified
+    ]
+    return JSONResponse(
+        content={
+            "verified": all(signature["verified"] for signature in signatures),
+            "signature_count": len(signatures),
+            "signatures": signatures
+        }
+    )
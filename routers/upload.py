@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from database import async_session, get_db
+from models.signatures import Signature
+from models.upload_session import UploadSession
+from models.user import User
+from routers.sign import load_signing_key
+from schemas.sign import UploadSessionCreate
+from utils.background import BackgroundTask
+from utils.auth import get_current_user, get_current_user_record
+from utils.crypto import build_signature_block
+from utils.crypto_executor import sign_digest_async
+from utils.storage import BlobWriter, blob_store
+from utils.ttl_cache import TTLCache
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024)))
+UPLOAD_WRITER_CACHE_SIZE = int(os.getenv("UPLOAD_WRITER_CACHE_SIZE", "1024"))
+UPLOAD_WRITER_CACHE_TTL = float(os.getenv("UPLOAD_WRITER_CACHE_TTL", "3600"))
+# Sessions idle this long are deleted with their temp files, as are stray blob-store temp files
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+UPLOAD_SWEEP_INTERVAL = float(os.getenv("UPLOAD_SWEEP_INTERVAL", "3600"))
+
+# Live hashers for sessions this worker has seen. Each covers a prefix of the session's file that
+# was once recorded as received, so when chunks went to other workers in between it only hashes
+# the bytes it missed; the whole prefix is read only the first time a worker sees a session.
+upload_writers = TTLCache("upload writers", UPLOAD_WRITER_CACHE_SIZE, UPLOAD_WRITER_CACHE_TTL,
+                          on_evict=lambda writer: writer.close())
+
+
+def _session_state(session: UploadSession) -> dict:
+    return {
+        "session_id": str(session.id),
+        "filename": session.filename,
+        "next_chunk": session.next_chunk,
+        "bytes_received": session.bytes_received,
+        "max_chunk_size": UPLOAD_MAX_CHUNK_SIZE,
+    }
+
+
+async def _load_session(session_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSession, lock: bool = False):
+    query = select(UploadSession).where(
+        UploadSession.id == session_id,
+        UploadSession.user_id == user_id,
+        UploadSession.updated_at > func.now() - timedelta(seconds=UPLOAD_SESSION_TTL)
+    )
+    if lock:
+        # Serializes chunks for one session across workers
+        query = query.with_for_update()
+    result = await db.execute(query)
+    session = result.scalars().first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+async def _session_writer(session: UploadSession) -> BlobWriter:
+    writer = upload_writers.get(session.id)
+    try:
+        if writer is None:
+            writer = await run_in_threadpool(BlobWriter.resume, session.temp_path, session.bytes_received)
+            upload_writers.set(session.id, writer)
+        elif writer.size != session.bytes_received:
+            # Other workers took chunks since this one last saw the session
+            await run_in_threadpool(writer.sync_to, session.bytes_received)
+    except (OSError, ValueError):
+        upload_writers.invalidate(session.id)
+        raise HTTPException(status_code=410, detail="Upload data is no longer available, start a new upload")
+    return writer
+
+
+@router.post("")
+async def create_upload_session(
+        data: UploadSessionCreate,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Starts a resumable upload. Send the file as numbered chunks, then finalize to sign it."""
+    writer = await run_in_threadpool(blob_store.writer)
+    session = UploadSession(id=uuid.uuid4(), user_id=user_id, filename=data.filename, temp_path=writer.temp_path,
+                            next_chunk=0, bytes_received=0)
+    db.add(session)
+    await db.commit()
+    upload_writers.set(session.id, writer)
+    return JSONResponse(status_code=201, content=_session_state(session))
+
+
+@router.get("/{session_id}")
+async def get_upload_session(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Reports which chunk to send next, for resuming an interrupted upload."""
+    return JSONResponse(content=_session_state(await _load_session(session_id, user_id, db)))
+
+
+@router.put("/{session_id}/chunks/{chunk_index}")
+async def upload_chunk(
+        session_id: uuid.UUID,
+        chunk_index: int,
+        request: Request,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Appends one chunk, sent as the raw request body. Chunks must arrive in order; resending the
+    previous chunk is acknowledged without writing it again."""
+    session = await _load_session(session_id, user_id, db)
+    # End the transaction so no connection or row lock is held while the client sends the body
+    await db.commit()
+
+    if chunk_index < session.next_chunk:
+        return JSONResponse(content={**_session_state(session), "duplicate": True})
+    if chunk_index > session.next_chunk:
+        raise HTTPException(status_code=409, detail=f"Expected chunk {session.next_chunk}")
+
+    offset = session.bytes_received
+    writer = await _session_writer(session)
+    # The chunk goes to a side file first; hashing happens as bytes arrive, so finalize never rereads it
+    staged = writer.stage()
+    received = 0
+    appending = False
+    try:
+        async for data in request.stream():
+            received += len(data)
+            if received > UPLOAD_MAX_CHUNK_SIZE:
+                raise HTTPException(status_code=413, detail=f"Chunks may be at most {UPLOAD_MAX_CHUNK_SIZE} bytes")
+            await run_in_threadpool(staged.write, data)
+        if received == 0:
+            raise HTTPException(status_code=400, detail="Empty chunk")
+
+        # Claims the chunk; the row stays locked until commit, so a racing request for the same chunk
+        # (or finalize) waits here and then matches nothing
+        result = await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == session.id,
+                UploadSession.next_chunk == chunk_index,
+                UploadSession.bytes_received == offset
+            )
+            .values(next_chunk=chunk_index + 1, bytes_received=offset + received)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=409, detail="Chunk was already received or the session has changed")
+
+        appending = True
+        await run_in_threadpool(writer.append_staged, staged)
+        await db.commit()
+    except BaseException:
+        if appending:
+            # The file and hash may now cover bytes that were never recorded; the next request rebuilds them
+            upload_writers.invalidate(session.id)
+        raise
+    finally:
+        await run_in_threadpool(staged.discard)
+        await run_in_threadpool(writer.close)
+    return JSONResponse(content={**_session_state(session), "next_chunk": chunk_index + 1,
+                                 "bytes_received": offset + received})
+
+
+@router.post("/{session_id}/finalize")
+async def finalize_upload(
+        session_id: uuid.UUID,
+        request: Request,
+        user_id: uuid.UUID = Depends(get_current_user),
+        user: User = Depends(get_current_user_record),
+        db: AsyncSession = Depends(get_db)
+):
+    """Signs the uploaded file from its running digest and stores the signed result."""
+    session = await _load_session(session_id, user_id, db, lock=True)
+    key_pair, private_key_pem = await load_signing_key(user, db)
+    writer = await _session_writer(session)
+
+    # The running hash covers exactly the document; the signature block is appended after it
+    document_digest = writer.digest()
+    try:
+        signature = await sign_digest_async(document_digest, private_key_pem, key_pair.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    block = build_signature_block(signature, key_pair.fingerprint, key_pair.algorithm)
+    storage_key = await run_in_threadpool(blob_store.commit_with_trailer, writer, block)
+    upload_writers.invalidate(session.id)
+
+    signed_filename = f"signed_{session.filename}"
+    signed_entry = Signature(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        filename=signed_filename,
+        signature=signature,
+        content_digest=writer.hexdigest(),
+        content_size=writer.size,
+        storage_key=storage_key,
+        document_digest=document_digest.hex(),
+        key_fingerprint=key_pair.fingerprint
+    )
+    db.add(signed_entry)
+    await db.delete(session)
+    await db.commit()
+
+    return JSONResponse(
+        content={
+            "signature_id": str(signed_entry.id),
+            "filename": signed_filename,
+            "signature": signature,
+            "download_url": str(request.url_for("download_signed_file", signature_id=signed_entry.id))
+        }
+    )
+
+
+@router.delete("/{session_id}")
+async def abort_upload(
+        session_id: uuid.UUID,
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Abandons an upload and deletes the bytes received so far."""
+    session = await _load_session(session_id, user_id, db, lock=True)
+    writer = upload_writers.get(session.id) or BlobWriter(session.temp_path)
+    upload_writers.invalidate(session.id)
+    await run_in_threadpool(writer.discard)
+    await db.delete(session)
+    await db.commit()
+    return {"message": "Upload session deleted"}
+
+
+class UploadSweeper:
+    """Periodically deletes upload sessions idle for longer than ttl, along with their temp files and any
+    other blob-store temp file left that long (e.g. by a worker that died mid-upload)."""
+
+    def __init__(self, ttl: float, interval: float):
+        self.ttl = ttl
+        self.interval = interval
+        self._task = BackgroundTask(self._sweep_loop)
+        self.sessions_removed = 0
+        self.files_removed = 0
+
+    async def sweep(self):
+        async with async_session() as db:
+            result = await db.execute(
+                delete(UploadSession)
+                .where(UploadSession.updated_at < func.now() - timedelta(seconds=self.ttl))
+                .returning(UploadSession.id, UploadSession.temp_path)
+            )
+            expired = result.all()
+            await db.commit()
+
+        for session_id, temp_path in expired:
+            upload_writers.invalidate(session_id)
+            await run_in_threadpool(BlobWriter(temp_path).discard)
+        self.sessions_removed += len(expired)
+        # One interval of slack so a live session's file is never removed before its row expires
+        self.files_removed += await run_in_threadpool(blob_store.remove_stale_temp_files, self.ttl + self.interval)
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning("Upload sweep failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+
+    def stats(self) -> dict:
+        return {
+            "session_ttl_seconds": self.ttl,
+            "sessions_removed": self.sessions_removed,
+            "files_removed": self.files_removed,
+        }
+
+
+upload_sweeper = UploadSweeper(UPLOAD_SESSION_TTL, UPLOAD_SWEEP_INTERVAL)
@@ -0,0 +1,35 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+SHA256_HEX_PATTERN = r"^[0-9a-fA-F]{64}$"
+
+
+class DigestSignRequest(BaseModel):
+    digest: str = Field(..., pattern=SHA256_HEX_PATTERN, description="Hex SHA-256 of the document")
+    filename: Optional[str] = None
+
+
+class DigestVerifyRequest(BaseModel):
+    digest: str = Field(..., pattern=SHA256_HEX_PATTERN, description="Hex SHA-256 of the document")
+    signature: str
+    # Required: without it every key would have to be tried
+    key_id: str = Field(..., min_length=1, description="Key id returned with the signature")
+    algorithm: Optional[str] = None  # Taken from the key when omitted
+
+
+class MerkleProofStep(BaseModel):
+    side: Literal["left", "right"]
+    hash: str = Field(..., pattern=SHA256_HEX_PATTERN)
+
+
+class MerkleVerifyRequest(BaseModel):
+    digest: str = Field(..., pattern=SHA256_HEX_PATTERN, description="Hex SHA-256 of the document")
+    root: str = Field(..., pattern=SHA256_HEX_PATTERN)
+    root_signature: str
+    proof: List[MerkleProofStep]
+    key_id: str = Field(..., min_length=1, description="Key id returned with the signed root")
+    algorithm: Optional[str] = None
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
@@ -9,6 +9,7 @@ class UserCreate(BaseModel):
     phone: str
     email: EmailStr
     password: str
+    signing_algorithm: Optional[str] = None  # One of rsa-2048, ecdsa-p256, ed25519
 
 class UserLogin(BaseModel):
     email: EmailStr
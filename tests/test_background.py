@@ -0,0 +1,24 @@
+import asyncio
+
+from utils.background import BackgroundTask
+
+
+def test_start_runs_once_and_stop_cancels():
+    started = []
+
+    async def loop():
+        started.append(True)
+        await asyncio.Event().wait()
+
+    async def scenario():
+        task = BackgroundTask(loop)
+        task.start()
+        task.start()
+        await asyncio.sleep(0)
+        running = task.running
+        await task.stop()
+        await task.stop()
+        return running, task.running
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert started == [True]
@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+
+from utils.downloads import parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=10-", (10, 1000)),
+    ("bytes=990-5000", (990, 1000)),
+    ("bytes=-100", (900, 1000)),
+    ("bytes=-5000", (0, 1000)),
+    ("  bytes=5-5 ", (5, 6)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None, "", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b", "bytes=5-2",
+])
+def test_ignored_ranges(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=0-", 0),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(HTTPException) as raised:
+        parse_range(header, size)
+    assert raised.value.status_code == 416
+    assert raised.value.headers == {"Content-Range": f"bytes */{size}"}
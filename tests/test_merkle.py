@@ -0,0 +1,60 @@
+import hashlib
+
+import pytest
+
+from utils import merkle
+
+
+def _digests(count: int) -> list:
+    return [hashlib.sha256(str(i).encode()).digest() for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 9, 16, 17, 100])
+def test_every_leaf_proves_inclusion(count):
+    digests = _digests(count)
+    levels = merkle.build_tree(digests)
+    root = levels[-1][0]
+    for index, digest in enumerate(digests):
+        proof = merkle.inclusion_proof(levels, index)
+        assert merkle.root_from_proof(digest, proof) == root
+        assert len(proof) <= (count - 1).bit_length()
+
+
+def test_single_leaf_root_is_its_leaf_hash():
+    digest = _digests(1)[0]
+    assert merkle.build_tree([digest])[-1] == [merkle.leaf_hash(digest)]
+
+
+def test_wrong_digest_or_tampered_proof_does_not_reach_the_root():
+    digests = _digests(6)
+    levels = merkle.build_tree(digests)
+    root = levels[-1][0]
+    proof = merkle.inclusion_proof(levels, 2)
+    assert merkle.root_from_proof(digests[3], proof) != root
+    side, sibling = proof[0]
+    flipped = [(merkle.LEFT if side == merkle.RIGHT else merkle.RIGHT, sibling)] + proof[1:]
+    assert merkle.root_from_proof(digests[2], flipped) != root
+
+
+def test_unpaired_nodes_are_promoted_not_duplicated():
+    digests = _digests(3)
+    # Duplicating the last leaf would give [a, b, c, c] the same root as [a, b, c]
+    assert merkle.build_tree(digests)[-1] != merkle.build_tree(digests + digests[-1:])[-1]
+
+
+def test_inner_nodes_cannot_pass_as_leaves():
+    digests = _digests(2)
+    levels = merkle.build_tree(digests)
+    forged_leaf = levels[0][0] + levels[0][1]
+    assert merkle.leaf_hash(hashlib.sha256(forged_leaf).digest()) != levels[-1][0]
+
+
+def test_root_message_is_domain_separated():
+    root = merkle.build_tree(_digests(4))[-1][0]
+    assert merkle.root_message(root) != root
+    assert merkle.root_message(root) != hashlib.sha256(root).digest()
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        merkle.build_tree([])
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis runs EVALSHA through Lua
+
+from utils.rate_limit import TokenBucketLimiter
+from utils.shared_store import RedisSharedStore
+
+
+def _store() -> RedisSharedStore:
+    return RedisSharedStore("redis://unused", "test:", client=fakeredis.FakeAsyncRedis())
+
+
+def test_take_tokens_allows_up_to_capacity_then_reports_retry_delay():
+    async def scenario():
+        store = _store()
+        delays = [await store.take_tokens("bucket", 3, 1.0, 1) for _ in range(4)]
+        return store, delays
+
+    store, delays = asyncio.run(scenario())
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert 0.9 < delays[3] <= 1.0
+    assert store.errors == 0
+
+
+def test_take_tokens_cost_above_available_reports_time_to_refill():
+    async def scenario():
+        store = _store()
+        await store.take_tokens("bucket", 10, 2.0, 10)
+        return await store.take_tokens("bucket", 10, 2.0, 4)
+
+    assert 1.9 < asyncio.run(scenario()) <= 2.0
+
+
+def test_take_tokens_refills_with_time():
+    async def scenario():
+        store = _store()
+        await store.take_tokens("bucket", 1, 20.0, 1)
+        rejected = await store.take_tokens("bucket", 1, 20.0, 1)
+        await asyncio.sleep(0.1)
+        return rejected, await store.take_tokens("bucket", 1, 20.0, 1)
+
+    rejected, after_refill = asyncio.run(scenario())
+    assert rejected > 0
+    assert after_refill == 0.0
+
+
+def test_take_tokens_keys_are_independent_and_expire():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        store = RedisSharedStore("redis://unused", "test:", client=client)
+        await store.take_tokens("a", 1, 0.5, 1)
+        other = await store.take_tokens("b", 1, 0.5, 1)
+        return other, await client.pttl("test:a")
+
+    other, ttl_ms = asyncio.run(scenario())
+    assert other == 0.0
+    # The bucket is dropped once it would be full again: capacity / rate seconds
+    assert 0 < ttl_ms <= 2000
+
+
+def test_limiter_shares_buckets_through_the_store():
+    async def scenario():
+        store = _store()
+        first = TokenBucketLimiter("login", 2, 1.0, shared=store)
+        second = TokenBucketLimiter("login", 2, 1.0, shared=store)
+        return [await first.take("ip"), await second.take("ip"), await first.take("ip")]
+
+    delays = asyncio.run(scenario())
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] > 0
+
+
+def test_limiter_falls_back_to_local_buckets_when_the_store_fails():
+    class BrokenRedis(fakeredis.FakeAsyncRedis):
+        async def evalsha(self, *args, **kwargs):
+            raise ConnectionError("down")
+
+    async def scenario():
+        store = RedisSharedStore("redis://unused", "test:", client=BrokenRedis())
+        limiter = TokenBucketLimiter("login", 1, 1.0, shared=store)
+        return store, [await limiter.take("ip"), await limiter.take("ip")]
+
+    store, delays = asyncio.run(scenario())
+    assert store.errors == 2
+    assert delays[0] == 0.0 and delays[1] > 0
@@ -0,0 +1,67 @@
+from utils.crypto import SIGNATURE_TRAILER_WINDOW, SignatureBlock, _peel_signature_block, build_signature_block, \
+    extract_signature, extract_signature_layers, extract_signatures
+
+DOCUMENT = b"%PDF-1.7\n\x00\xff binary body \x80\n"
+
+
+def test_peel_finds_the_block_ending_the_content():
+    signed = DOCUMENT + build_signature_block("c2ln", "ab" * 32, "ed25519")
+    content_end, block = _peel_signature_block(signed, len(signed))
+    assert signed[:content_end] == DOCUMENT
+    assert block == SignatureBlock(signature="c2ln", key_id="ab" * 32, algorithm="ed25519")
+
+
+def test_peel_reads_legacy_blocks_without_headers():
+    signed = DOCUMENT + b"\n\n--- SIGNATURE START ---\nbGVnYWN5\n--- SIGNATURE END ---"
+    content_end, block = _peel_signature_block(signed, len(signed))
+    assert signed[:content_end] == DOCUMENT
+    assert block.signature == "bGVnYWN5" and block.key_id is None
+
+
+def test_peel_tolerates_trailing_whitespace_only():
+    block = build_signature_block("c2ln")
+    assert _peel_signature_block(DOCUMENT + block + b"\r\n ", len(DOCUMENT + block) + 3) is not None
+    assert _peel_signature_block(DOCUMENT + block + b"tail", len(DOCUMENT + block) + 4) is None
+
+
+def test_peel_keeps_content_without_the_blank_line_separator():
+    signed = DOCUMENT + b"--- SIGNATURE START ---\nc2ln\n--- SIGNATURE END ---"
+    content_end, _ = _peel_signature_block(signed, len(signed))
+    assert signed[:content_end] == DOCUMENT
+
+
+def test_peel_returns_none_for_unsigned_or_broken_blocks():
+    assert _peel_signature_block(DOCUMENT, len(DOCUMENT)) is None
+    end_only = DOCUMENT + b"\n--- SIGNATURE END ---"
+    assert _peel_signature_block(end_only, len(end_only)) is None
+    not_ascii = DOCUMENT + b"\n\n--- SIGNATURE START ---\n\xff\n--- SIGNATURE END ---"
+    assert _peel_signature_block(not_ascii, len(not_ascii)) is None
+
+
+def test_peel_only_scans_the_trailer_window():
+    block = build_signature_block("c2ln")
+    signed = DOCUMENT + block + b" " * SIGNATURE_TRAILER_WINDOW
+    assert _peel_signature_block(signed, len(signed)) is None
+
+
+def test_peel_respects_limit():
+    block = build_signature_block("Zmlyc3Q=")
+    signed = DOCUMENT + block + build_signature_block("c2Vjb25k")
+    content_end, first = _peel_signature_block(signed, len(DOCUMENT + block))
+    assert first.signature == "Zmlyc3Q=" and signed[:content_end] == DOCUMENT
+
+
+def test_extract_signatures_returns_blocks_in_signing_order():
+    signed = DOCUMENT + build_signature_block("Zmlyc3Q=", "aa") + build_signature_block("c2Vjb25k", "bb")
+    original_content, blocks = extract_signatures(signed)
+    assert original_content.tobytes() == DOCUMENT
+    assert [block.key_id for block in blocks] == ["aa", "bb"]
+    original_content, first = extract_signature(signed)
+    assert first.key_id == "aa"
+
+
+def test_layers_mark_where_each_block_starts():
+    once = DOCUMENT + build_signature_block("Zmlyc3Q=")
+    twice = once + build_signature_block("c2Vjb25k")
+    assert [content_end for content_end, _ in extract_signature_layers(twice)] == [len(DOCUMENT), len(once)]
+    assert extract_signature_layers(DOCUMENT) == []
@@ -0,0 +1,122 @@
+import pytest
+
+from utils import ttl_cache
+from utils.ttl_cache import OwnerIndex, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_returns_stored_values_and_counts_hits_and_misses():
+    cache = TTLCache("test", 10, 60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_entries_expire_after_ttl(clock):
+    evicted = []
+    cache = TTLCache("test", 10, 60, on_evict=evicted.append)
+    cache.set("a", 1)
+    clock[0] += 59
+    assert cache.get("a") == 1
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert evicted == [1]
+    assert cache.evictions == 1 and len(cache) == 0
+
+
+def test_per_entry_ttl_is_capped_by_the_default(clock):
+    cache = TTLCache("test", 10, 60)
+    cache.set("long", 1, ttl=600)
+    cache.set("short", 2, ttl=5)
+    cache.set("none", 3, ttl=0)
+    clock[0] += 10
+    assert cache.get("short") is None
+    assert cache.get("none") is None
+    clock[0] += 49
+    assert cache.get("long") == 1
+    clock[0] += 1
+    assert cache.get("long") is None
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    evicted = []
+    cache = TTLCache("test", 2, 60, on_evict=evicted.append)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert evicted == [2]
+    assert cache.get("a") == 1 and cache.get("c") == 3 and cache.get("b") is None
+
+
+def test_replacing_a_value_evicts_the_old_one_only():
+    evicted = []
+    cache = TTLCache("test", 10, 60, on_evict=evicted.append)
+    value = object()
+    cache.set("a", value)
+    cache.set("a", value)
+    assert evicted == []
+    cache.set("a", "new")
+    assert evicted == [value]
+
+
+def test_unusable_values_count_as_misses_and_stay_cached():
+    cache = TTLCache("test", 10, 60)
+    cache.set("a", "stale")
+    assert cache.get("a", usable=lambda value: value == "fresh") is None
+    assert cache.get("a", usable=lambda value: value == "stale") == "stale"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidate_and_clear_call_on_evict():
+    evicted = []
+    cache = TTLCache("test", 10, 60, on_evict=evicted.append)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert evicted == [1]
+    cache.clear()
+    assert evicted == [1, 2]
+    assert len(cache) == 0
+
+
+def test_on_evict_may_use_the_cache():
+    cache = TTLCache("test", 1, 60)
+    cache._on_evict = lambda value: cache.get(value)
+    cache.set("a", "a")
+    # on_evict runs outside the lock, so this does not deadlock
+    cache.set("b", "b")
+    assert cache.get("b") == "b"
+
+
+def test_owner_index_invalidates_every_entry_of_an_owner():
+    index = OwnerIndex()
+    cache = TTLCache("test", 10, 60, on_evict=lambda entry: index.discard(entry[0], entry[1]))
+    for owner, key in (("alice", "a1"), ("alice", "a2"), ("bob", "b1")):
+        cache.set(key, (owner, key))
+        index.add(owner, key)
+    for key in index.pop("alice"):
+        cache.invalidate(key)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") == ("bob", "b1")
+    assert index.pop("alice") == set()
+
+
+def test_owner_index_forgets_evicted_entries():
+    index = OwnerIndex()
+    cache = TTLCache("test", 1, 60, on_evict=lambda entry: index.discard(entry[0], entry[1]))
+    cache.set("a1", ("alice", "a1"))
+    index.add("alice", "a1")
+    cache.set("b1", ("bob", "b1"))
+    index.add("bob", "b1")
+    assert len(index) == 1
+    assert index.pop("bob") == {"b1"}
@@ -1,14 +1,15 @@
 import secrets
 import hashlib
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import APIKeyHeader
 from sqlalchemy.orm import selectinload
 
-from models import User
 from models.api_key import ApiKey
 from database import get_db
+from utils.api_key_cache import ApiPrincipal, api_key_cache
 
 # Security scheme: API Key in headers
 api_key_header = APIKeyHeader(name="X-API-KEY", auto_error=True)
@@ -21,12 +22,12 @@ def generate_api_key() -> str:
     return raw_key, hashed_key  # Return both raw and hashed key
 
 
-async def store_api_key(user_id: str, session: AsyncSession) -> str:
+async def store_api_key(user_id: str, session: AsyncSession, tier: str = "starter") -> str:
     """Generates and stores an API key for a user."""
     raw_key, hashed_key = generate_api_key()
 
     # Store in DB
-    api_key_entry = ApiKey(user_id=user_id, api_key=hashed_key)
+    api_key_entry = ApiKey(user_id=user_id, api_key=hashed_key, tier=tier)
     session.add(api_key_entry)
     await session.commit()
 
@@ -50,18 +51,29 @@ async def verify_api_key(api_key: str, session: AsyncSession) -> ApiKey:
     return api_key_obj
 
 
-async def get_api_key_user(api_key: str = Security(api_key_header), session: AsyncSession = Depends(get_db)):
-    """Dependency to get user from API key, ensuring relationships are preloaded."""
+async def get_api_principal(api_key: str = Security(api_key_header), session: AsyncSession = Depends(get_db)):
+    """Dependency resolving the API key to its ApiPrincipal, from the cache when possible."""
+    started_at = time.perf_counter()
+    hashed_key = hashlib.sha256(api_key.encode()).hexdigest()
+
+    principal = api_key_cache.get(hashed_key)
+    if principal is not None:
+        api_key_cache.record_lookup(started_at)
+        return principal
 
+    # Taken before the query, so an invalidation that races it keeps the result out of the cache
+    read_at = api_key_cache.generation()
+    db_started_at = time.perf_counter()
     result = await session.execute(
-        select(ApiKey)
-        .options(selectinload(ApiKey.user).selectinload(User.api_keys))  # ✅ Correctly load user + api_keys
-        .where(ApiKey.api_key == hashlib.sha256(api_key.encode()).hexdigest(), ApiKey.is_active == True)
+        select(ApiKey.id, ApiKey.user_id, ApiKey.tier)
+        .where(ApiKey.api_key == hashed_key, ApiKey.is_active == True)
     )
+    row = result.first()
+    api_key_cache.record_lookup(started_at, db_started_at)
 
-    api_key_obj = result.scalars().first()
-
-    if not api_key_obj:
+    if not row:
         raise HTTPException(status_code=403, detail="Invalid API key")
 
-    return api_key_obj.user
\ No newline at end of file
+    principal = ApiPrincipal(user_id=row.user_id, key_id=row.id, tier=row.tier, is_active=True)
+    api_key_cache.put(hashed_key, principal, read_at)
+    return principal
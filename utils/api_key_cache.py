@@ -0,0 +1,134 @@
+import os
+import time
+import uuid
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+from utils.background import BackgroundTask
+from utils.shared_store import shared_store
+from utils.ttl_cache import OwnerIndex, TTLCache
+
+load_dotenv()
+
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "10000"))
+# Without a shared store this also bounds how long another worker may accept a revoked key
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+
+_INVALIDATION_CHANNEL = "api-key-invalidations"
+
+
+class ApiPrincipal(NamedTuple):
+    """The caller behind an API key, as seen by /api/v1 routes."""
+    user_id: uuid.UUID
+    key_id: uuid.UUID
+    tier: str
+    is_active: bool
+
+
+class ApiKeyCache:
+    """Maps hashed API keys to their ApiPrincipal so authenticated calls skip the database.
+
+    Only active keys are cached. Revoking or replacing keys invalidates them in this worker at once
+    and, when SHARED_STORE_URL is set, in every other worker through a pub/sub channel.
+
+    A lookup that read the database before an invalidation must not cache what it read afterwards,
+    so callers take a generation() before querying and pass it to put(). Each invalidation bumps the
+    generation and records it for the user, and put() skips users invalidated since the read began.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared=None):
+        self._local = TTLCache("api keys", maxsize, ttl, on_evict=self._unindex)
+        self._shared = shared
+        self._by_user = OwnerIndex()
+        self._generation = 0
+        # user_id -> generation of its last invalidation; once a mark is forgotten, every put from
+        # a read that began before it is refused, so a lost mark can only cost a cache fill
+        self._invalidated_at = TTLCache("api key invalidations", maxsize, ttl, on_evict=self._forget_mark)
+        self._refuse_before = 0
+        self._subscriber = BackgroundTask(
+            lambda: self._shared.subscribe(_INVALIDATION_CHANNEL, self._on_invalidation, on_subscribed=self._resubscribed)
+        )
+        self._lookups = 0
+        self._lookup_seconds = 0.0
+        self._db_lookups = 0
+        self._db_lookup_seconds = 0.0
+
+    def _unindex(self, entry: tuple):
+        hashed_key, principal = entry
+        self._by_user.discard(principal.user_id, hashed_key)
+
+    def _forget_mark(self, generation: int):
+        self._refuse_before = max(self._refuse_before, generation)
+
+    def _resubscribed(self):
+        # Invalidations may have been missed while disconnected: drop everything and refuse reads in flight
+        with self._by_user.lock:
+            self._generation += 1
+            self._refuse_before = self._generation
+        self._local.clear()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, hashed_key: str):
+        entry = self._local.get(hashed_key)
+        return entry[1] if entry is not None else None
+
+    def put(self, hashed_key: str, principal: ApiPrincipal, read_at: int):
+        """Caches a principal read from the database after generation() returned read_at."""
+        if not principal.is_active:
+            return
+        with self._by_user.lock:
+            invalidated_at = self._invalidated_at.get(principal.user_id)
+            if read_at < self._refuse_before or (invalidated_at is not None and invalidated_at > read_at):
+                # Invalidated while the lookup was in flight; what it read may already be revoked
+                return
+            # Set first: replacing an existing entry unindexes its key
+            self._local.set(hashed_key, (hashed_key, principal))
+            self._by_user.add(principal.user_id, hashed_key)
+
+    def _invalidate_local(self, user_id: uuid.UUID):
+        with self._by_user.lock:
+            self._generation += 1
+            self._invalidated_at.set(user_id, self._generation)
+            hashed_keys = self._by_user.pop(user_id)
+        for hashed_key in hashed_keys:
+            self._local.invalidate(hashed_key)
+
+    async def invalidate_user(self, user_id: uuid.UUID):
+        """Drops every cached key of a user, here and in the other workers."""
+        self._invalidate_local(user_id)
+        if self._shared is not None:
+            await self._shared.publish(_INVALIDATION_CHANNEL, str(user_id))
+
+    def _on_invalidation(self, message: str):
+        self._invalidate_local(uuid.UUID(message))
+
+    def record_lookup(self, started_at: float, db_started_at: float = None):
+        """Records auth latency; db_started_at is set when the lookup missed the cache."""
+        finished_at = time.perf_counter()
+        self._lookups += 1
+        self._lookup_seconds += finished_at - started_at
+        if db_started_at is not None:
+            self._db_lookups += 1
+            self._db_lookup_seconds += finished_at - db_started_at
+
+    def start(self):
+        if self._shared is not None:
+            self._subscriber.start()
+
+    async def stop(self):
+        await self._subscriber.stop()
+
+    def stats(self) -> dict:
+        stats = self._local.stats()
+        stats["avg_auth_ms"] = round(self._lookup_seconds / self._lookups * 1000, 3) if self._lookups else None
+        stats["db_lookups"] = self._db_lookups
+        stats["avg_db_lookup_ms"] = (
+            round(self._db_lookup_seconds / self._db_lookups * 1000, 3) if self._db_lookups else None
+        )
+        stats["cross_worker_invalidation"] = self._shared is not None
+        return stats
+
+
+api_key_cache = ApiKeyCache(API_KEY_CACHE_SIZE, API_KEY_CACHE_TTL, shared_store)
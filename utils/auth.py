@@ -1,3 +1,5 @@
+import hashlib
+import time
 import uuid
 from typing import Optional
 import jwt
@@ -5,19 +7,29 @@ import datetime
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from dotenv import load_dotenv
 import os
 
+from database import get_db
+from models.user import User
+from utils.ttl_cache import TTLCache
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Claims of recently verified tokens, keyed by token hash; an entry never outlives its token's exp
+verified_tokens = TTLCache("verified tokens", JWT_CACHE_SIZE, JWT_CACHE_TTL)
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -31,14 +43,22 @@ def create_access_token(data: dict, expires_delta: Optional[datetime.timedelta]
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str):
+    token_hash = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(token_hash)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    if "exp" in payload:
+        verified_tokens.set(token_hash, payload, ttl=payload["exp"] - time.time())
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> uuid.UUID:
     payload = decode_access_token(token)
     if "sub" not in payload:
@@ -48,3 +68,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> uuid.UUID:
         return uuid.UUID(payload["sub"])
     except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user ID format")
+
+
+async def get_current_user_record(
+        user_id: uuid.UUID = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+) -> User:
+    """Loads the authenticated User once per request; FastAPI shares it with every dependency asking for it."""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
@@ -0,0 +1,29 @@
+import asyncio
+
+
+class BackgroundTask:
+    """Runs a coroutine as an asyncio task between start() and stop(), for the lifespan-managed loops.
+
+    run is called with no arguments on each start(); stop() cancels the task and waits for it to finish.
+    """
+
+    def __init__(self, run):
+        self._run = run
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from database import async_session
+from models.signatures import Signature
+from utils.background import BackgroundTask
+from utils.storage import blob_store
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BLOB_SWEEP_INTERVAL = float(os.getenv("BLOB_SWEEP_INTERVAL", "86400"))
+BLOB_SWEEP_BATCH = int(os.getenv("BLOB_SWEEP_BATCH", "1000"))
+
+
+def _delete_blobs(storage_keys) -> int:
+    return sum(blob_store.delete(storage_key) for storage_key in storage_keys)
+
+
+async def release_blobs(db: AsyncSession, storage_keys) -> int:
+    """Deletes those of storage_keys that no Signature row references any more; call it once the
+    rows that used them are deleted and committed. Returns how many blobs were removed."""
+    storage_keys = {storage_key for storage_key in storage_keys if storage_key}
+    if not storage_keys:
+        return 0
+    result = await db.execute(
+        select(Signature.storage_key).where(Signature.storage_key.in_(storage_keys)).distinct()
+    )
+    unreferenced = storage_keys - set(result.scalars().all())
+    return await run_in_threadpool(_delete_blobs, unreferenced)
+
+
+class BlobSweeper:
+    """Periodically deletes blobs no row references: ones release_blobs kept because they had just been
+    committed again, and ones left by requests that failed between storing a blob and its row."""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task = BackgroundTask(self._sweep_loop)
+        self.blobs_removed = 0
+
+    async def sweep(self):
+        storage_keys = iter(await run_in_threadpool(lambda: list(blob_store.iter_storage_keys())))
+        async with async_session() as db:
+            while batch := [key for _, key in zip(range(self.batch_size), storage_keys)]:
+                self.blobs_removed += await release_blobs(db, batch)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning("Blob sweep failed: %s", e)
+
+    def start(self):
+        self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+
+    def stats(self) -> dict:
+        return {"blobs_removed": self.blobs_removed}
+
+
+blob_sweeper = BlobSweeper(BLOB_SWEEP_INTERVAL, BLOB_SWEEP_BATCH)
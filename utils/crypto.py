@@ -1,22 +1,59 @@
 import base64
 import os
-import re
 import binascii
+import hashlib
+import json
+from datetime import datetime
 from hashlib import pbkdf2_hmac
+from typing import NamedTuple, Optional
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.asymmetric import padding, rsa, ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 from cryptography.hazmat.primitives.serialization import load_pem_public_key
 
+SIGNATURE_START = "--- SIGNATURE START ---"
+SIGNATURE_END = "--- SIGNATURE END ---"
+_SIGNATURE_START_MARKER = f"{SIGNATURE_START}\n".encode()
+_SIGNATURE_END_MARKER = f"\n{SIGNATURE_END}".encode()
+# Signature blocks are a few hundred bytes; only this much of a document's tail is searched
+SIGNATURE_TRAILER_WINDOW = 8 * 1024
+MAX_SIGNATURE_BLOCKS = 64
+KEY_ID_HEADER = "Key-Id"
+ALGORITHM_HEADER = "Algorithm"
+
+RSA_2048 = "rsa-2048"
+ECDSA_P256 = "ecdsa-p256"
+ED25519 = "ed25519"
+SIGNING_ALGORITHMS = (RSA_2048, ECDSA_P256, ED25519)
+
+
+class SignatureBlock(NamedTuple):
+    signature: str
+    key_id: Optional[str] = None
+    algorithm: str = RSA_2048  # Blocks that predate the Algorithm header are always RSA
+
 
 def generate_encryption_key(password: str, salt: bytes) -> bytes:
     """Generate a stable 256-bit encryption key using PBKDF2."""
     return pbkdf2_hmac("sha256", password.encode(), salt, 100000)
 
 
-def generate_rsa_key_pair():
-    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+def _generate_private_key(algorithm: str):
+    if algorithm == RSA_2048:
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == ECDSA_P256:
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == ED25519:
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+
+def generate_key_pair(algorithm: str = RSA_2048):
+    """Generates a (public_pem, private_pem) pair for one of SIGNING_ALGORITHMS."""
+    private_key = _generate_private_key(algorithm)
     private_pem = private_key.private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
@@ -28,6 +65,20 @@ def generate_rsa_key_pair():
     ).decode()
     return public_pem, private_pem
 
+
+def generate_rsa_key_pair():
+    return generate_key_pair(RSA_2048)
+
+
+def public_key_fingerprint(public_key_pem: str) -> str:
+    """SHA-256 fingerprint of the DER-encoded public key, used as the signature block key id."""
+    public_key = load_pem_public_key(public_key_pem.encode())
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()
+
 def derive_key(password, salt):
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
@@ -39,22 +90,15 @@ def derive_key(password, salt):
 
 
 def encrypt_private_key(private_key: str, password: str, salt: bytes) -> str:
-    """Encrypt private key using PBKDF2-derived key."""
+    """Encrypt private key using PBKDF2-derived key (legacy scheme, see envelope_encrypt_private_key)."""
     key = generate_encryption_key(password, salt)
     iv = os.urandom(12)
 
-    print(f"Encrypting Private Key: {private_key[:30]}...")  # Print first 30 chars
-    print(f"Encryption Key: {key}")
-
     cipher = Cipher(algorithms.AES(key), modes.GCM(iv))
     encryptor = cipher.encryptor()
     ciphertext = encryptor.update(private_key.encode()) + encryptor.finalize()
 
-    encrypted_data = base64.b64encode(salt + iv + encryptor.tag + ciphertext).decode()
-    print(f"Final Encrypted Private Key: {encrypted_data[:60]}...")  # Print snippet
-
-    return encrypted_data
-
+    return base64.b64encode(salt + iv + encryptor.tag + ciphertext).decode()
 
 
 def decrypt_private_key(encrypted_private_key: str, password: str, salt: bytes) -> bytes:
@@ -62,59 +106,111 @@ def decrypt_private_key(encrypted_private_key: str, password: str, salt: bytes)
     encrypted_data = base64.b64decode(encrypted_private_key)
     stored_salt, iv, tag, ciphertext = encrypted_data[:16], encrypted_data[16:28], encrypted_data[28:44], encrypted_data[44:]
 
-    print(f"Stored Salt from Encrypted Data: {stored_salt}")
-    print(f"Provided Salt from DB: {salt}")
-
     if stored_salt != salt:
         raise ValueError("Salt mismatch. Decryption key derivation failed.")
 
     key = generate_encryption_key(password, stored_salt)
 
-    print(f"Derived Key for Decryption: {key}")
-    print(f"Derived Key Length: {len(key)} bytes")
-    print(f"Ciphertext Before Decryption: {ciphertext[:30]}...")  # Print snippet
-
     cipher = Cipher(algorithms.AES(key), modes.GCM(iv, tag))
     decryptor = cipher.decryptor()
+    return decryptor.update(ciphertext) + decryptor.finalize()
 
-    try:
-        decrypted_data = decryptor.update(ciphertext) + decryptor.finalize()
-        print(f"Decryption Successful: {decrypted_data[:30]}...")  # Print first 30 bytes
-        return decrypted_data
-    except Exception as e:
-        print(f"Decryption failed: {str(e)}")  # Print exact error
-        raise
 
+def wrap_data_key(kek: bytes, data_key: bytes, aad: bytes) -> str:
+    """Wraps a per-user data key with the server key-encryption key."""
+    nonce = os.urandom(12)
+    return base64.b64encode(nonce + AESGCM(kek).encrypt(nonce, data_key, aad)).decode()
 
 
+def unwrap_data_key(kek: bytes, wrapped_data_key: str, aad: bytes) -> bytes:
+    wrapped = base64.b64decode(wrapped_data_key)
+    return AESGCM(kek).decrypt(wrapped[:12], wrapped[12:], aad)
 
-def sign_document(document_bytes, private_key_pem):
+
+def envelope_encrypt_private_key(private_key: str, kek: bytes, aad: bytes):
+    """Encrypts a private key under a fresh data key. Returns (encrypted_private_key, wrapped_data_key)."""
+    data_key = AESGCM.generate_key(bit_length=256)
+    nonce = os.urandom(12)
+    ciphertext = AESGCM(data_key).encrypt(nonce, private_key.encode(), aad)
+    return base64.b64encode(nonce + ciphertext).decode(), wrap_data_key(kek, data_key, aad)
+
+
+def envelope_decrypt_private_key(encrypted_private_key: str, wrapped_data_key: str, kek: bytes, aad: bytes) -> bytes:
+    data_key = unwrap_data_key(kek, wrapped_data_key, aad)
+    encrypted_data = base64.b64decode(encrypted_private_key)
+    return AESGCM(data_key).decrypt(encrypted_data[:12], encrypted_data[12:], aad)
+
+
+def hash_document(document_bytes) -> bytes:
+    """SHA-256 digest of a document; this digest is what every signature covers."""
+    hasher = hashes.Hash(hashes.SHA256())
+    hasher.update(document_bytes)
+    return hasher.finalize()
+
+
+def _signed_message_hash(document_digest: bytes) -> bytes:
+    # Signatures have always been made over the document digest as the message, so the
+    # prehashed value handed to the signer is SHA-256 of that digest.
+    return hashlib.sha256(document_digest).digest()
+
+
+def _pss_padding():
+    return padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()),
+        salt_length=padding.PSS.MAX_LENGTH
+    )
+
+
+def load_private_key(private_key_pem):
+    if isinstance(private_key_pem, str):
+        private_key_pem = private_key_pem.encode()
+    return serialization.load_pem_private_key(bytes(private_key_pem), password=None)
+
+
+def load_public_key(public_key_pem):
+    if isinstance(public_key_pem, str):
+        public_key_pem = public_key_pem.encode()
+    return load_pem_public_key(bytes(public_key_pem))
+
+
+def sign_digest(document_digest: bytes, private_key):
+    """Signs a precomputed document digest. private_key is a PEM or an already parsed key.
+
+    Every algorithm signs the 32-byte document digest as its message, so RSA and ECDSA
+    use the prehashed form and Ed25519 signs the digest directly.
+    """
     try:
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode(),
-            password=None
-        )
-        hasher = hashes.Hash(hashes.SHA256())
-        hasher.update(document_bytes)
-        document_hash = hasher.finalize()
-        signature = private_key.sign(
-            document_hash,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        if isinstance(private_key, (str, bytes, bytearray)):
+            private_key = load_private_key(private_key)
+        if isinstance(private_key, rsa.RSAPrivateKey):
+            signature = private_key.sign(
+                _signed_message_hash(document_digest),
+                _pss_padding(),
+                Prehashed(hashes.SHA256())
+            )
+        elif isinstance(private_key, ec.EllipticCurvePrivateKey):
+            signature = private_key.sign(
+                _signed_message_hash(document_digest),
+                ec.ECDSA(Prehashed(hashes.SHA256()))
+            )
+        elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+            signature = private_key.sign(document_digest)
+        else:
+            raise ValueError(f"Unsupported key type: {type(private_key).__name__}")
         return base64.b64encode(signature).decode("utf-8").strip()
     except Exception as e:
         raise ValueError(f"Signing failed: {str(e)}")
 
 
+def sign_document(document_bytes, private_key_pem):
+    return sign_digest(hash_document(document_bytes), private_key_pem)
 
-def verify_signature(document_bytes, signature, public_key_pem):
+
+def verify_digest(document_digest: bytes, signature, public_key):
     try:
-        # Load Public Key
-        public_key = load_pem_public_key(public_key_pem.encode())
+        # Load Public Key unless an already parsed key was passed
+        if isinstance(public_key, (str, bytes, bytearray)):
+            public_key = load_public_key(public_key)
 
         # Decode Signature (Ensure it's Base64 valid)
         try:
@@ -122,21 +218,24 @@ def verify_signature(document_bytes, signature, public_key_pem):
         except binascii.Error:
             raise ValueError("Invalid Base64 encoding in signature.")
 
-        # Hash the Document
-        digest = hashes.Hash(hashes.SHA256())
-        digest.update(document_bytes)
-        document_hash = digest.finalize()
-
-        # Verify the Signature
-        public_key.verify(
-            signature_bytes,
-            document_hash,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        # Verify the Signature with the scheme matching the key type
+        if isinstance(public_key, rsa.RSAPublicKey):
+            public_key.verify(
+                signature_bytes,
+                _signed_message_hash(document_digest),
+                _pss_padding(),
+                Prehashed(hashes.SHA256())
+            )
+        elif isinstance(public_key, ec.EllipticCurvePublicKey):
+            public_key.verify(
+                signature_bytes,
+                _signed_message_hash(document_digest),
+                ec.ECDSA(Prehashed(hashes.SHA256()))
+            )
+        elif isinstance(public_key, ed25519.Ed25519PublicKey):
+            public_key.verify(signature_bytes, document_digest)
+        else:
+            raise ValueError(f"Unsupported key type: {type(public_key).__name__}")
 
         return {"message": "Signature is valid", "verified": True}
 
@@ -148,21 +247,135 @@ def verify_signature(document_bytes, signature, public_key_pem):
         return {"error": f"Signature verification failed: {str(e)}", "verified": False}
 
 
-def extract_signature(file_content: bytes):
-    try:
-        content_str = file_content.decode(errors="ignore")
-
-        match = re.search(r"--- SIGNATURE START ---\n(.*?)\n--- SIGNATURE END ---", content_str, re.DOTALL)
-        if not match:
-            return None, None
+def verify_signature(document_bytes, signature, public_key_pem):
+    return verify_digest(hash_document(document_bytes), signature, public_key_pem)
+
+
+def build_signature_block(signature: str, key_id: Optional[str] = None, algorithm: Optional[str] = None) -> bytes:
+    """Builds the block appended to a signed document. Header lines precede the signature."""
+    lines = []
+    if algorithm:
+        lines.append(f"{ALGORITHM_HEADER}: {algorithm}")
+    if key_id:
+        lines.append(f"{KEY_ID_HEADER}: {key_id}")
+    lines.append(signature)
+    return (f"\n\n{SIGNATURE_START}\n" + "\n".join(lines) + f"\n{SIGNATURE_END}").encode()
+
+
+def _parse_signature_block(block_body: str) -> SignatureBlock:
+    """Parses a block body. Legacy blocks carry only the signature."""
+    headers = {}
+    signature_lines = []
+    for line in block_body.strip().splitlines():
+        name, sep, value = line.partition(":")
+        # Base64 never contains ':', so any such line is a header
+        if sep and not signature_lines:
+            headers[name.strip()] = value.strip()
+        else:
+            signature_lines.append(line.strip())
+    return SignatureBlock(
+        signature="".join(signature_lines),
+        key_id=headers.get(KEY_ID_HEADER),
+        algorithm=headers.get(ALGORITHM_HEADER, RSA_2048)
+    )
 
-        signature_b64 = match.group(1).strip()
-        print(f"Extracted Signature (Base64): {repr(signature_b64)}")
 
-        original_content = content_str.replace(match.group(0), "").encode()
+def _peel_signature_block(file_content, limit: int):
+    """Finds the block ending file_content[:limit]. Returns (content_end, SignatureBlock) or None."""
+    tail_start = max(limit - SIGNATURE_TRAILER_WINDOW, 0)
 
-        return original_content, signature_b64
+    end = file_content.rfind(_SIGNATURE_END_MARKER, tail_start, limit)
+    if end == -1 or file_content[end + len(_SIGNATURE_END_MARKER):limit].strip():
+        return None
+    start = file_content.rfind(_SIGNATURE_START_MARKER, tail_start, end)
+    if start == -1:
+        return None
 
-    except Exception as e:
-        print(f"Signature Extraction Failed: {e}")
+    try:
+        block = _parse_signature_block(bytes(file_content[start + len(_SIGNATURE_START_MARKER):end]).decode("ascii"))
+    except UnicodeDecodeError:
+        return None
+
+    content_end = start
+    if file_content[max(start - 2, 0):start] == b"\n\n":
+        content_end -= 2
+    return content_end, block
+
+
+def extract_signature_layers(file_content) -> list:
+    """Returns [(content_end, SignatureBlock), ...] in signing order, empty when unsigned.
+
+    content_end is where the bytes before each block stop. A block added by countersigning signs
+    the document, file_content[:content_end] of the first block; one added by signing an already
+    signed file again signs everything before it, file_content[:content_end] of its own.
+    """
+    layers = []
+    content_end = len(file_content)
+    while len(layers) < MAX_SIGNATURE_BLOCKS:
+        peeled = _peel_signature_block(file_content, content_end)
+        if peeled is None:
+            break
+        content_end = peeled[0]
+        layers.append(peeled)
+    layers.reverse()
+    return layers
+
+
+def extract_signatures(file_content):
+    """Returns (original_content, [SignatureBlock, ...]) in signing order, or (None, []) when unsigned.
+
+    A multi-signature container is the document followed by one block per signer, every block
+    signing the same document digest. Blocks are peeled backwards from the end, so only the
+    trailer is scanned and the document body is never decoded. file_content may be bytes, a
+    bytearray or an mmap; original_content is a memoryview over it, to be released before an
+    mmap is closed.
+    """
+    layers = extract_signature_layers(file_content)
+    if not layers:
+        return None, []
+    return memoryview(file_content)[:layers[0][0]], [block for _, block in layers]
+
+
+def extract_signature(file_content):
+    """Returns (original_content, SignatureBlock) for the first signer, or (None, None) when unsigned."""
+    original_content, blocks = extract_signatures(file_content)
+    return original_content, (blocks[0] if blocks else None)
+
+
+SIGNATURE_MANIFEST_VERSION = 1
+
+
+def build_signature_manifest(document_digest: bytes, signature: str, key_id: Optional[str], algorithm: str,
+                             signed_at: datetime, filename: Optional[str] = None) -> bytes:
+    """Builds a detached signature manifest. Only the digest is signed; the other fields are informational."""
+    return json.dumps({
+        "version": SIGNATURE_MANIFEST_VERSION,
+        "filename": filename,
+        "algorithm": algorithm,
+        "key_id": key_id,
+        "document_digest": document_digest.hex(),
+        "signature": signature,
+        "signed_at": signed_at.isoformat(),
+    }, indent=2).encode()
+
+
+def _optional_text(value) -> bool:
+    return value is None or (isinstance(value, str) and value != "")
+
+
+def parse_signature_manifest(manifest: bytes):
+    """Returns (document_digest, SignatureBlock), or (None, None) when the manifest is malformed."""
+    try:
+        fields = json.loads(manifest)
+        if not isinstance(fields, dict):
+            return None, None
+        document_digest = bytes.fromhex(fields["document_digest"])
+        signature, key_id, algorithm = fields["signature"], fields.get("key_id"), fields.get("algorithm")
+    except (ValueError, KeyError, TypeError):
+        return None, None
+    # key_id and algorithm may be absent (null), but anything else must be a non-empty string
+    if len(document_digest) != hashlib.sha256().digest_size or not isinstance(signature, str) \
+            or not _optional_text(key_id) or not _optional_text(algorithm):
         return None, None
+    block = SignatureBlock(signature=signature, key_id=key_id, algorithm=algorithm or RSA_2048)
+    return document_digest, block
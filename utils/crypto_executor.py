@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+
+from utils import auth, crypto, key_cache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CRYPTO_EXECUTOR_MODE = os.getenv("CRYPTO_EXECUTOR_MODE", "process")  # "process" or "thread"
+CRYPTO_MAX_WORKERS = int(os.getenv("CRYPTO_MAX_WORKERS", str(os.cpu_count() or 1)))
+CRYPTO_MAX_PENDING = int(os.getenv("CRYPTO_MAX_PENDING", "256"))
+# bcrypt releases the GIL, so password hashing runs in threads with its own, smaller admission budget
+PASSWORD_MAX_WORKERS = int(os.getenv("PASSWORD_MAX_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(4 * PASSWORD_MAX_WORKERS)))
+
+
+class CryptoExecutor:
+    """Runs CPU-bound work off the event loop with a bounded number of in-flight jobs."""
+
+    def __init__(self, name: str, mode: str, max_workers: int, max_pending: int):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.name = name
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._by_operation = defaultdict(int)
+        self._worker_counters = {}  # pid -> latest key_cache.worker_counters() from that worker process
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                # spawn keeps worker processes clear of the parent's event loop and DB connections
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            logger.info("Started %s %s pool with %d workers", self.name, self.mode, self.max_workers)
+        return self._pool
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) in the pool, rejecting with 503 once max_pending jobs are in flight."""
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{self.name} is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        self._submitted += 1
+        self._by_operation[fn.__name__] += 1
+        submitted_at = time.perf_counter()
+        try:
+            result, started_at, finished_at, worker = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), _timed_call, fn, args, self.mode == "process"
+            )
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self._completed += 1
+        if worker is not None:
+            pid, counters = worker
+            self._worker_counters[pid] = counters
+        # perf_counter is system-wide on Linux, so timestamps from worker processes are comparable
+        self._wait_seconds += max(started_at - submitted_at, 0.0)
+        self._busy_seconds += finished_at - started_at
+        return result
+
+    def stats(self) -> dict:
+        completed = self._completed or 1
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "peak_pending": self._peak_pending,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._wait_seconds / completed * 1000, 3),
+            "avg_run_ms": round(self._busy_seconds / completed * 1000, 3),
+            "operations": dict(self._by_operation),
+        }
+
+    def worker_key_cache_stats(self):
+        """Key cache totals across worker processes; None in thread mode, where key_cache.stats() covers it."""
+        if self.mode != "process":
+            return None
+        return key_cache.combine_worker_counters(self._worker_counters.values())
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _timed_call(fn, args, report_counters: bool):
+    started_at = time.perf_counter()
+    result = fn(*args)
+    finished_at = time.perf_counter()
+    # Worker processes keep their own key caches; their counters ride back with each result
+    worker = (os.getpid(), key_cache.worker_counters()) if report_counters else None
+    return result, started_at, finished_at, worker
+
+
+crypto_executor = CryptoExecutor("crypto executor", CRYPTO_EXECUTOR_MODE, CRYPTO_MAX_WORKERS, CRYPTO_MAX_PENDING)
+password_executor = CryptoExecutor("password executor", "thread", PASSWORD_MAX_WORKERS, PASSWORD_MAX_PENDING)
+
+
+# --- Awaitable wrappers used by the routers ---
+
+async def hash_password_async(password: str) -> str:
+    return await password_executor.run(auth.hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_executor.run(auth.verify_password, plain_password, hashed_password)
+
+
+async def generate_key_pair_async(algorithm: str = crypto.RSA_2048):
+    return await crypto_executor.run(crypto.generate_key_pair, algorithm)
+
+
+async def encrypt_private_key_async(private_key: str, password: str, salt: bytes) -> str:
+    return await crypto_executor.run(crypto.encrypt_private_key, private_key, password, salt)
+
+
+async def decrypt_private_key_async(encrypted_private_key: str, password: str, salt: bytes) -> bytes:
+    return await crypto_executor.run(crypto.decrypt_private_key, encrypted_private_key, password, salt)
+
+
+async def sign_digest_async(document_digest: bytes, private_key_pem: str, key_pair_id=None) -> str:
+    """Signs a digest; passing key_pair_id lets the executor reuse a cached parsed key."""
+    if key_pair_id is not None:
+        return await crypto_executor.run(key_cache.sign_digest_cached, document_digest, key_pair_id, private_key_pem)
+    return await crypto_executor.run(crypto.sign_digest, document_digest, private_key_pem)
+
+
+async def sign_digests_async(document_digests: list, private_key_pem: str, key_pair_id) -> list:
+    """Signs many digests with one key, split into one job per worker so the key is parsed once per worker."""
+    if not document_digests:
+        return []
+    chunk_size = -(-len(document_digests) // crypto_executor.max_workers)
+    chunks = [document_digests[i:i + chunk_size] for i in range(0, len(document_digests), chunk_size)]
+    results = await asyncio.gather(*(
+        crypto_executor.run(key_cache.sign_digests_cached, chunk, key_pair_id, private_key_pem) for chunk in chunks
+    ))
+    return [signature for chunk_signatures in results for signature in chunk_signatures]
+
+
+async def sign_document_async(document_bytes, private_key_pem: str, key_pair_id=None) -> str:
+    # Hash in a thread (hashlib releases the GIL) so only the 32-byte digest crosses into the pool
+    document_digest = await run_in_threadpool(crypto.hash_document, document_bytes)
+    return await sign_digest_async(document_digest, private_key_pem, key_pair_id)
+
+
+async def verify_digest_async(document_digest: bytes, signature: str, public_key_pem: str, key_pair_id=None) -> dict:
+    if key_pair_id is not None:
+        return await crypto_executor.run(
+            key_cache.verify_digest_cached, document_digest, signature, key_pair_id, public_key_pem
+        )
+    return await crypto_executor.run(crypto.verify_digest, document_digest, signature, public_key_pem)
+
+
+async def verify_signature_async(document_bytes, signature: str, public_key_pem: str, key_pair_id=None) -> dict:
+    document_digest = await run_in_threadpool(crypto.hash_document, document_bytes)
+    return await verify_digest_async(document_digest, signature, public_key_pem, key_pair_id)
@@ -0,0 +1,102 @@
+import re
+from fastapi import Request, Response, HTTPException
+from starlette.responses import StreamingResponse
+
+from utils.storage import blob_store
+
+# Signed content never changes once stored, so clients may cache it indefinitely
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, size: int):
+    """Parses a single-range `Range` header into [start, end).
+
+    Returns None when the header should be ignored (absent, malformed or multi-range) and
+    raises 416 when the range cannot be satisfied, which is always the case for an empty file.
+    """
+    match = _RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first != "" and last != "" and int(last) < int(first):
+        # Syntactically invalid (RFC 9110, 14.1.1), so ignored rather than unsatisfiable
+        return None
+    if size == 0:
+        raise _range_not_satisfiable(size)
+
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise _range_not_satisfiable(size)
+        return max(size - length, 0), size
+
+    start = int(first)
+    end = size if last == "" else min(int(last) + 1, size)
+    if start >= size:
+        raise _range_not_satisfiable(size)
+    return start, end
+
+
+def _range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(status_code=416, detail="Requested range not satisfiable",
+                         headers={"Content-Range": f"bytes */{size}"})
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def iter_segments(segments, start: int = 0, end: int = None):
+    """Yields bytes [start, end) of the concatenation of (storage_key, size) blob segments."""
+    offset = 0
+    for storage_key, size in segments:
+        segment_start, segment_end = max(start - offset, 0), size if end is None else min(end - offset, size)
+        if segment_start < segment_end:
+            yield from blob_store.iter_chunks(storage_key, segment_start, segment_end)
+        offset += size
+        if end is not None and offset >= end:
+            break
+
+
+def blob_download_response(request: Request, segments, etag_value: str, filename: str, media_type: str) -> Response:
+    """Streams stored blob segments as one file, honouring If-None-Match, Range and If-Range.
+
+    segments is a list of (storage_key, size); a plain signed file is a single segment and its
+    etag_value is the SHA-256 of its bytes.
+    """
+    content_size = sum(size for _, size in segments)
+    etag = f'"{etag_value}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        # The client's partial copy is of different content: send the whole file, even for a bad range
+        byte_range = None
+    else:
+        byte_range = parse_range(request.headers.get("range"), content_size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(content_size)
+        return StreamingResponse(iter_segments(segments), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{content_size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        iter_segments(segments, start, end), status_code=206, media_type=media_type, headers=headers
+    )
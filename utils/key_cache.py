@@ -0,0 +1,127 @@
+import os
+from dotenv import load_dotenv
+
+from utils.crypto import load_private_key, load_public_key, sign_digest, verify_digest
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+
+PUBLIC_KEY_CACHE_SIZE = int(os.getenv("PUBLIC_KEY_CACHE_SIZE", "10000"))
+PUBLIC_KEY_CACHE_TTL = float(os.getenv("PUBLIC_KEY_CACHE_TTL", "3600"))
+PRIVATE_KEY_CACHE_SIZE = int(os.getenv("PRIVATE_KEY_CACHE_SIZE", "256"))
+PRIVATE_KEY_CACHE_TTL = float(os.getenv("PRIVATE_KEY_CACHE_TTL", "60"))
+
+
+class PrivateKeyEntry:
+    """Decrypted PEM plus its parsed key object, parsed lazily where signing happens."""
+
+    __slots__ = ("pem", "key")
+
+    def __init__(self, pem: bytearray, key=None):
+        self.pem = pem
+        self.key = key
+
+
+def _zero_private_entry(entry: PrivateKeyEntry):
+    # The PEM buffer is ours to scrub; the parsed key lives in OpenSSL and is freed with its last reference
+    entry.pem[:] = bytes(len(entry.pem))
+    entry.key = None
+
+
+public_key_cache = TTLCache("public keys", PUBLIC_KEY_CACHE_SIZE, PUBLIC_KEY_CACHE_TTL)
+private_key_cache = TTLCache("private keys", PRIVATE_KEY_CACHE_SIZE, PRIVATE_KEY_CACHE_TTL,
+                             on_evict=_zero_private_entry)
+
+
+def get_private_key_pem(key_pair_id):
+    """Returns a cached decrypted PEM for the key pair, or None."""
+    entry = private_key_cache.get(key_pair_id)
+    return entry.pem.decode() if entry is not None else None
+
+
+def put_private_key_pem(key_pair_id, private_key_pem: str):
+    private_key_cache.set(key_pair_id, PrivateKeyEntry(bytearray(private_key_pem.encode())))
+
+
+def get_private_key(key_pair_id, private_key_pem: str):
+    pem = private_key_pem.encode()
+    # The PEM check means an entry is only ever used for the exact key the caller loaded; a stale or
+    # PEM-only entry counts as a miss and is replaced
+    entry = private_key_cache.get(key_pair_id, usable=lambda cached: cached.key is not None and cached.pem == pem)
+    key = entry.key if entry is not None else None
+    if key is not None:
+        return key
+
+    # Parse from the caller's PEM: a concurrently evicted entry may already be zeroed
+    private_key = load_private_key(private_key_pem)
+    private_key_cache.set(key_pair_id, PrivateKeyEntry(bytearray(pem), private_key))
+    return private_key
+
+
+def get_public_key(key_pair_id, public_key_pem: str):
+    entry = public_key_cache.get(key_pair_id, usable=lambda cached: cached[0] == public_key_pem)
+    if entry is not None:
+        return entry[1]
+    public_key = load_public_key(public_key_pem)
+    public_key_cache.set(key_pair_id, (public_key_pem, public_key))
+    return public_key
+
+
+# Executor entry points. In thread mode they share this process's caches. In process mode each
+# worker keeps its own, which invalidate_key_pair cannot reach; that stays safe because every
+# call passes the PEM the caller just loaded and a cached key is only used when its PEM matches,
+# so a rotated or deleted key pair is never served from a worker's cache. Workers report their
+# counters back through worker_counters, collected by the executor for /metrics.
+
+def sign_digest_cached(document_digest: bytes, key_pair_id, private_key_pem: str) -> str:
+    return sign_digest(document_digest, get_private_key(key_pair_id, private_key_pem))
+
+
+def sign_digests_cached(document_digests: list, key_pair_id, private_key_pem: str) -> list:
+    private_key = get_private_key(key_pair_id, private_key_pem)
+    return [sign_digest(document_digest, private_key) for document_digest in document_digests]
+
+
+def verify_digest_cached(document_digest: bytes, signature: str, key_pair_id, public_key_pem: str) -> dict:
+    try:
+        public_key = get_public_key(key_pair_id, public_key_pem)
+    except Exception as e:
+        return {"error": f"Signature verification failed: {str(e)}", "verified": False}
+    return verify_digest(document_digest, signature, public_key)
+
+
+def invalidate_key_pair(key_pair_id):
+    """Drops every cached object for a key pair in this process (not in executor worker processes)."""
+    private_key_cache.invalidate(key_pair_id)
+    public_key_cache.invalidate(key_pair_id)
+
+
+def stats() -> dict:
+    return {
+        "public_keys": public_key_cache.stats(),
+        "private_keys": private_key_cache.stats(),
+    }
+
+
+def worker_counters() -> dict:
+    """Cumulative cache counters of the calling process, small enough to return with every executor job."""
+    return {
+        cache.name: (cache.hits, cache.misses, cache.evictions, len(cache))
+        for cache in (public_key_cache, private_key_cache)
+    }
+
+
+def combine_worker_counters(snapshots) -> dict:
+    """Sums the latest worker_counters() snapshot of each worker process into stats()-like totals."""
+    totals = {}
+    for snapshot in snapshots:
+        for name, (hits, misses, evictions, size) in snapshot.items():
+            total = totals.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0, "size": 0})
+            total["hits"] += hits
+            total["misses"] += misses
+            total["evictions"] += evictions
+            total["size"] += size
+    for total in totals.values():
+        lookups = total["hits"] + total["misses"]
+        total["hit_rate"] = round(total["hits"] / lookups, 4) if lookups else None
+    return totals
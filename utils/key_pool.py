@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from utils.background import BackgroundTask
+from utils.crypto import RSA_2048
+from utils.crypto_executor import generate_key_pair_async
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+KEY_POOL_SIZE = int(os.getenv("KEY_POOL_SIZE", "32"))
+KEY_POOL_LOW_WATER = int(os.getenv("KEY_POOL_LOW_WATER", "8"))
+KEY_POOL_REFILL_CONCURRENCY = int(os.getenv("KEY_POOL_REFILL_CONCURRENCY", "2"))
+
+
+class KeyPairPool:
+    """Keeps freshly generated key pairs in memory so registration rarely waits on keygen.
+
+    Pairs never leave process memory and are handed out at most once. Refills run on the
+    crypto executor, so generation happens in worker processes in the default mode. Only
+    RSA is pooled; EC and Ed25519 keygen is cheap enough to run on demand.
+    """
+
+    def __init__(self, size: int, low_water: int, refill_concurrency: int, algorithm: str = RSA_2048):
+        self.algorithm = algorithm
+        self.size = size
+        self.low_water = low_water
+        self.refill_concurrency = refill_concurrency
+        self._pairs = deque()
+        self._refill_needed = asyncio.Event()
+        self._task = BackgroundTask(self._refill_loop)
+        self._served_from_pool = 0
+        self._inline_fallbacks = 0
+        self._generated = 0
+        self._refill_seconds = 0.0
+
+    def start(self):
+        if self.size > 0 and not self._task.running:
+            self._refill_needed.set()
+            self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+        self._pairs.clear()
+
+    async def acquire(self, algorithm: str = RSA_2048):
+        """Returns (public_pem, private_pem), generating inline only when the pool is empty."""
+        if algorithm != self.algorithm:
+            return await generate_key_pair_async(algorithm)
+
+        if self._pairs:
+            pair = self._pairs.popleft()
+            self._served_from_pool += 1
+        else:
+            pair = None
+            self._inline_fallbacks += 1
+
+        if len(self._pairs) < self.low_water:
+            self._refill_needed.set()
+
+        if pair is None:
+            pair = await generate_key_pair_async(self.algorithm)
+        return pair
+
+    async def _refill_loop(self):
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            while len(self._pairs) < self.size:
+                batch = min(self.refill_concurrency, self.size - len(self._pairs))
+                started_at = time.perf_counter()
+                results = await asyncio.gather(
+                    *(generate_key_pair_async(self.algorithm) for _ in range(batch)),
+                    return_exceptions=True
+                )
+                self._refill_seconds += time.perf_counter() - started_at
+
+                pairs = [result for result in results if not isinstance(result, BaseException)]
+                self._pairs.extend(pairs)
+                self._generated += len(pairs)
+
+                if len(pairs) < batch:
+                    errors = [result for result in results if isinstance(result, BaseException)]
+                    if not all(isinstance(error, HTTPException) for error in errors):
+                        logger.warning("Key pool refill failed: %s", errors[0])
+                    # Executor busy or failing: back off and let request traffic through
+                    await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._pairs),
+            "capacity": self.size,
+            "low_water": self.low_water,
+            "served_from_pool": self._served_from_pool,
+            "inline_fallbacks": self._inline_fallbacks,
+            "generated": self._generated,
+            "refill_rate_per_second": round(self._generated / self._refill_seconds, 2) if self._refill_seconds else None,
+        }
+
+
+key_pool = KeyPairPool(KEY_POOL_SIZE, KEY_POOL_LOW_WATER, KEY_POOL_REFILL_CONCURRENCY)
@@ -0,0 +1,70 @@
+import os
+import uuid
+from functools import lru_cache
+from dotenv import load_dotenv
+
+from models.keys import KeyPair
+from models.user import User
+from utils.crypto import envelope_encrypt_private_key, envelope_decrypt_private_key
+from utils.crypto_executor import decrypt_private_key_async
+from utils.key_cache import get_private_key_pem, put_private_key_pem, invalidate_key_pair
+
+load_dotenv()
+
+KEY_ENCRYPTION_KEY_FILE = os.getenv("KEY_ENCRYPTION_KEY_FILE", "secrets/kek.bin")
+
+
+@lru_cache(maxsize=1)
+def load_key_encryption_key() -> bytes:
+    """Loads the 32-byte server key-encryption key from KEY_ENCRYPTION_KEY_FILE."""
+    try:
+        with open(KEY_ENCRYPTION_KEY_FILE, "rb") as f:
+            kek = f.read()
+    except FileNotFoundError:
+        raise RuntimeError(
+            f"Key-encryption key not found at {KEY_ENCRYPTION_KEY_FILE}; "
+            "create one with `python migrate_private_keys.py --generate-kek`"
+        )
+    if len(kek) != 32:
+        raise RuntimeError(f"Key-encryption key at {KEY_ENCRYPTION_KEY_FILE} must be exactly 32 bytes")
+    return kek
+
+
+def generate_key_encryption_key_file(path: str = KEY_ENCRYPTION_KEY_FILE):
+    """Writes a new random key-encryption key. Refuses to overwrite an existing one."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(os.urandom(32))
+
+
+def _key_aad(user_id: uuid.UUID) -> bytes:
+    # Binds the ciphertext and wrapped data key to their owner
+    return str(user_id).encode()
+
+
+def seal_private_key(key_pair: KeyPair, private_key_pem: str):
+    """Envelope-encrypts a private key into the given key pair row."""
+    key_pair.private_key, key_pair.wrapped_data_key = envelope_encrypt_private_key(
+        private_key_pem, load_key_encryption_key(), _key_aad(key_pair.user_id)
+    )
+    if key_pair.id is not None:
+        invalidate_key_pair(key_pair.id)
+
+
+async def load_private_key_pem(key_pair: KeyPair, user: User) -> str:
+    """Decrypts a user's private key, using the legacy PBKDF2 path only for rows not yet migrated."""
+    cached = get_private_key_pem(key_pair.id)
+    if cached is not None:
+        return cached
+
+    if key_pair.wrapped_data_key:
+        private_key_pem = envelope_decrypt_private_key(
+            key_pair.private_key, key_pair.wrapped_data_key, load_key_encryption_key(), _key_aad(key_pair.user_id)
+        ).decode()
+    else:
+        decrypted = await decrypt_private_key_async(key_pair.private_key, user.hashed_password, user.encryption_salt)
+        private_key_pem = decrypted.decode()
+
+    put_private_key_pem(key_pair.id, private_key_pem)
+    return private_key_pem
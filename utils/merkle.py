@@ -0,0 +1,60 @@
+import hashlib
+
+# Domain-separation prefixes (as in RFC 6962) so a leaf can never be passed off as an inner node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+# Prefix for the message actually signed, so a root signature is never a valid document signature
+_ROOT_CONTEXT = b"esign-merkle-root-v1\x00"
+
+LEFT = "left"
+RIGHT = "right"
+
+
+def leaf_hash(document_digest: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + document_digest).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def root_message(root: bytes) -> bytes:
+    """The 32-byte digest signed for a batch root."""
+    return hashlib.sha256(_ROOT_CONTEXT + root).digest()
+
+
+def build_tree(document_digests: list) -> list:
+    """Returns every level of the tree, leaves first and the root level last.
+
+    An unpaired node at the end of a level is promoted unchanged rather than duplicated, so no two
+    different leaf lists share a root.
+    """
+    if not document_digests:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [[leaf_hash(document_digest) for document_digest in document_digests]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def inclusion_proof(levels: list, index: int) -> list:
+    """Returns the sibling path for leaf index as [(side, sibling_hash), ...], leaf level first."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append((LEFT if sibling < index else RIGHT, level[sibling]))
+        index //= 2
+    return proof
+
+
+def root_from_proof(document_digest: bytes, proof: list) -> bytes:
+    """Recomputes the root from a leaf and its [(side, sibling_hash), ...] path."""
+    current = leaf_hash(document_digest)
+    for side, sibling in proof:
+        current = node_hash(sibling, current) if side == LEFT else node_hash(current, sibling)
+    return current
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from database import async_session
+from models.signatures import Signature
+from utils import merkle
+from utils.crypto import build_signature_manifest
+from utils.crypto_executor import sign_digest_async
+from utils.storage import blob_store
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MERKLE_BATCH_WINDOW_MS = float(os.getenv("MERKLE_BATCH_WINDOW_MS", "50"))
+MERKLE_BATCH_MAX_ITEMS = int(os.getenv("MERKLE_BATCH_MAX_ITEMS", "256"))
+
+
+class MerkleReceipt(NamedTuple):
+    """What one document gets back from a batch: its place in the tree and the signed root."""
+    leaf_index: int
+    batch_size: int
+    root: bytes
+    root_signature: str
+    proof: list  # [(side, sibling_hash), ...]
+    signature_id: uuid.UUID  # The Signature row recording the root
+
+
+class _PendingBatch:
+    __slots__ = ("key_pair", "private_key_pem", "digests", "futures", "timer")
+
+    def __init__(self, key_pair, private_key_pem: str):
+        self.key_pair = key_pair
+        self.private_key_pem = private_key_pem
+        self.digests = []
+        self.futures = []
+        self.timer = None
+
+
+class MerkleBatcher:
+    """Collects document digests per signing key and signs a single Merkle root per batch.
+
+    A batch closes after window_ms or once it holds max_items digests, whichever comes first,
+    so N documents cost one private-key operation plus O(N log N) hashing. Each signed root is
+    recorded as one Signature row, like any other signature, before its receipts are handed out.
+    """
+
+    def __init__(self, window_ms: float, max_items: int):
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self._pending = {}
+        self._signing = set()  # Strong references so running batch tasks are not garbage collected
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+
+    async def submit(self, key_pair, private_key_pem: str, document_digest: bytes) -> MerkleReceipt:
+        batch = self._pending.get(key_pair.id)
+        if batch is None:
+            batch = _PendingBatch(key_pair, private_key_pem)
+            self._pending[key_pair.id] = batch
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._close, key_pair.id)
+
+        future = asyncio.get_running_loop().create_future()
+        batch.digests.append(document_digest)
+        batch.futures.append(future)
+        if len(batch.digests) >= self.max_items:
+            self._close(key_pair.id)
+        return await future
+
+    def _close(self, key_pair_id):
+        batch = self._pending.pop(key_pair_id, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._sign_batch(batch))
+        self._signing.add(task)
+        task.add_done_callback(self._signing.discard)
+
+    async def _sign_batch(self, batch: _PendingBatch):
+        try:
+            levels = merkle.build_tree(batch.digests)
+            root = levels[-1][0]
+            root_signature = await sign_digest_async(
+                merkle.root_message(root), batch.private_key_pem, batch.key_pair.id
+            )
+            signature_id = await self._record_root(batch, root, root_signature)
+        except Exception as e:
+            self._failed_batches += 1
+            logger.warning("Merkle batch of %d failed: %s", len(batch.digests), e)
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._batches += 1
+        self._items += len(batch.digests)
+        for index, future in enumerate(batch.futures):
+            # A client that disconnected has a cancelled future; the rest of the batch is unaffected
+            if not future.done():
+                future.set_result(MerkleReceipt(
+                    index, len(batch.digests), root, root_signature, merkle.inclusion_proof(levels, index), signature_id
+                ))
+
+    @staticmethod
+    async def _record_root(batch: _PendingBatch, root: bytes, root_signature: str) -> uuid.UUID:
+        """Stores the root signature as a detached manifest with its Signature row; returns the row id."""
+        key_pair = batch.key_pair
+        signed_digest = merkle.root_message(root)
+        filename = f"merkle-root-{root.hex()}.sig"
+        manifest = build_signature_manifest(
+            signed_digest, root_signature, key_pair.fingerprint, key_pair.algorithm, datetime.now(timezone.utc), filename
+        )
+        content_digest, content_size, storage_key = await run_in_threadpool(blob_store.put_bytes, manifest)
+
+        signed_entry = Signature(
+            id=uuid.uuid4(),
+            user_id=key_pair.user_id,
+            filename=filename,
+            signature=root_signature,
+            content_digest=content_digest,
+            content_size=content_size,
+            storage_key=storage_key,
+            document_digest=signed_digest.hex(),
+            key_fingerprint=key_pair.fingerprint,
+            detached=True,
+            merkle_root=root.hex(),
+            merkle_leaf_count=len(batch.digests)
+        )
+        async with async_session() as db:
+            db.add(signed_entry)
+            await db.commit()
+        return signed_entry.id
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_items": self.max_items,
+            "open_batches": len(self._pending),
+            "batches_signed": self._batches,
+            "documents_signed": self._items,
+            "failed_batches": self._failed_batches,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else None,
+        }
+
+
+merkle_batcher = MerkleBatcher(MERKLE_BATCH_WINDOW_MS, MERKLE_BATCH_MAX_ITEMS)
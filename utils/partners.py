@@ -0,0 +1,34 @@
+import uuid
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.contract_partner import ContractPartner
+
+
+async def add_partners(db: AsyncSession, user_a: uuid.UUID, user_b: uuid.UUID):
+    """Records a partnership in both orientations; re-accepting an existing partnership is a no-op."""
+    await db.execute(
+        insert(ContractPartner)
+        .values([{"user_id": user_a, "partner_id": user_b}, {"user_id": user_b, "partner_id": user_a}])
+        .on_conflict_do_nothing()
+    )
+
+
+async def are_partners(db: AsyncSession, user_a: uuid.UUID, user_b: uuid.UUID) -> bool:
+    result = await db.execute(
+        select(ContractPartner.partner_id).where(ContractPartner.user_id == user_a, ContractPartner.partner_id == user_b)
+    )
+    return result.first() is not None
+
+
+async def partners_among(db: AsyncSession, user_id: uuid.UUID, candidate_ids) -> set:
+    """Returns the subset of candidate_ids that are partners of user_id."""
+    if not candidate_ids:
+        return set()
+    result = await db.execute(
+        select(ContractPartner.partner_id).where(
+            ContractPartner.user_id == user_id, ContractPartner.partner_id.in_(candidate_ids)
+        )
+    )
+    return set(result.scalars().all())
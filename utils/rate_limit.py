@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import NamedTuple
+from fastapi import Depends, HTTPException, Request, Response, status
+from dotenv import load_dotenv
+
+from utils.api_auth import get_api_principal
+from utils.api_key_cache import ApiPrincipal
+from utils.background import BackgroundTask
+from utils.shared_store import shared_store
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Only enable behind a proxy that overwrites X-Forwarded-For, otherwise clients can pick their own key
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+PASSWORD_IP_BURST = int(os.getenv("PASSWORD_IP_BURST", "20"))
+PASSWORD_IP_PER_MINUTE = float(os.getenv("PASSWORD_IP_PER_MINUTE", "10"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "1"))
+
+# "tier:requests_per_second/burst", comma separated; keys with an unknown tier get the starter limit
+API_RATE_LIMITS = os.getenv("API_RATE_LIMITS", "starter:5/20,pro:50/100,enterprise:200/400")
+API_RATE_LIMIT_DEFAULT_TIER = os.getenv("API_RATE_LIMIT_DEFAULT_TIER", "starter")
+API_RATE_LIMIT_SYNC_SECONDS = float(os.getenv("API_RATE_LIMIT_SYNC_SECONDS", "1"))
+API_RATE_LIMIT_SYNC_BATCH = int(os.getenv("API_RATE_LIMIT_SYNC_BATCH", "1000"))
+API_RATE_LIMIT_COUNTER_TTL = 3600
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketLimiter:
+    """Token bucket per key: up to capacity requests at once, refilled at refill_per_second.
+
+    Buckets live in a process-local LRU, or in the shared store when SHARED_STORE_URL is set so
+    every worker draws from the same bucket. If the shared store fails, the local bucket is used.
+    """
+
+    def __init__(self, name: str, capacity: int, refill_per_second: float, shared=None):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        # An idle bucket is full again after this long, so forgetting it changes nothing
+        self._buckets = TTLCache(name, RATE_LIMIT_MAX_KEYS, capacity / refill_per_second)
+        self._shared = shared
+        self.allowed = 0
+        self.rejected = 0
+
+    def _take_local(self, key: str, cost: int) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(self.capacity, now)
+        else:
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill_per_second)
+            bucket.updated = now
+
+        retry_after = 0.0
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+        else:
+            retry_after = (cost - bucket.tokens) / self.refill_per_second
+        # Re-set on every take so the expiry tracks the last use, not the first
+        self._buckets.set(key, bucket)
+        return retry_after
+
+    async def take(self, key: str, cost: int = 1) -> float:
+        """Takes cost tokens for key. Returns 0 when allowed, otherwise the seconds until it would be."""
+        retry_after = None
+        if self._shared is not None:
+            retry_after = await self._shared.take_tokens(
+                f"rate:{self.name}:{key}", self.capacity, self.refill_per_second, cost
+            )
+        if retry_after is None:
+            retry_after = self._take_local(key, cost)
+
+        if retry_after > 0:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    async def check(self, key: str, cost: int = 1):
+        """Raises 429 with Retry-After when key has run out of tokens."""
+        retry_after = await self.take(key, cost)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "tracked_keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "backend": "shared" if self._shared is not None else "local",
+        }
+
+
+class TierLimit(NamedTuple):
+    per_second: float
+    burst: int
+
+
+class RateLimitState(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: float  # Until the bucket is full again
+    retry_after: float  # Until the next token, 0 when allowed
+
+
+def parse_tier_limits(spec: str) -> dict:
+    """Parses "tier:per_second/burst,..." into {tier: TierLimit}; burst defaults to one second's worth."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tier, _, rate = item.partition(":")
+        per_second, _, burst = rate.partition("/")
+        per_second = float(per_second)
+        limits[tier.strip()] = TierLimit(per_second, int(burst) if burst else max(int(per_second), 1))
+    return limits
+
+
+class _KeyUsage:
+    __slots__ = ("counter_key", "limit", "tokens", "updated", "unsynced", "pushed", "seen_remote")
+
+    def __init__(self, key, limit: TierLimit, now: float):
+        self.counter_key = f"api-rate:{key}"
+        self.limit = limit
+        self.tokens = float(limit.burst)
+        self.updated = now
+        self.unsynced = 0  # Requests allowed here since the last sync
+        self.pushed = 0  # Requests this worker has added to the shared counter
+        self.seen_remote = None  # Other workers' share of the shared counter at the last sync
+
+
+class TierRateLimiter:
+    """Token bucket per API key, sized by the key's tier.
+
+    Buckets are plain in-memory objects touched only from the event loop, so a check is a few
+    float operations with no lock and no network call. When SHARED_STORE_URL is set, a background
+    task pushes each key's usage to a shared counter every sync_seconds and drains what the other
+    workers spent from the local bucket, so a key's limit holds across workers to within about one
+    interval. A worker takes the counter's value when it first syncs a key as its baseline.
+    """
+
+    def __init__(self, limits: dict, default_tier: str, sync_seconds: float, shared=None):
+        self.limits = limits
+        self.default_limit = limits[default_tier]
+        self.sync_seconds = sync_seconds
+        self._shared = shared
+        self._usage = {}
+        self._task = BackgroundTask(self._sync_loop)
+        self.allowed = 0
+        self.rejected = 0
+        self.syncs = 0
+        self.sync_failures = 0
+        self.last_sync_ms = None
+
+    def take(self, key, tier: str) -> RateLimitState:
+        limit = self.limits.get(tier, self.default_limit)
+        now = time.monotonic()
+        usage = self._usage.get(key)
+        if usage is None:
+            usage = self._usage[key] = _KeyUsage(key, limit, now)
+        else:
+            # Picks up tier changes on the next request
+            usage.limit = limit
+            usage.tokens = min(limit.burst, usage.tokens + (now - usage.updated) * limit.per_second)
+            usage.updated = now
+
+        allowed = usage.tokens >= 1
+        if allowed:
+            usage.tokens -= 1
+            usage.unsynced += 1
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return RateLimitState(
+            allowed,
+            limit.burst,
+            max(int(usage.tokens), 0),
+            (limit.burst - usage.tokens) / limit.per_second,
+            0.0 if allowed else (1 - usage.tokens) / limit.per_second,
+        )
+
+    def _prune(self, now: float):
+        # A key idle long enough to be full again carries no state worth keeping
+        idle = [
+            key for key, usage in self._usage.items()
+            if not usage.unsynced and now - usage.updated > usage.limit.burst / usage.limit.per_second
+        ]
+        for key in idle:
+            del self._usage[key]
+
+    async def sync(self):
+        """Reconciles local buckets with the shared counters; without a shared store it only prunes."""
+        self._prune(time.monotonic())
+        if self._shared is None:
+            return
+
+        # Only keys spent here since the last sync; an unused bucket is drained on its next sync instead
+        active = [(usage, usage.unsynced) for usage in self._usage.values() if usage.unsynced]
+        if not active:
+            return
+        started_at = time.perf_counter()
+        # One round trip per batch, so a worker with many busy keys never stalls the loop for long
+        for offset in range(0, len(active), API_RATE_LIMIT_SYNC_BATCH):
+            await self._sync_batch(active[offset:offset + API_RATE_LIMIT_SYNC_BATCH])
+        self.syncs += 1
+        self.last_sync_ms = round((time.perf_counter() - started_at) * 1000, 3)
+
+    async def _sync_batch(self, batch: list):
+        for usage, delta in batch:
+            usage.unsynced -= delta
+        totals = await self._shared.increment_counters(
+            {usage.counter_key: delta for usage, delta in batch}, API_RATE_LIMIT_COUNTER_TTL
+        )
+        if totals is None:
+            self.sync_failures += 1
+            for usage, delta in batch:
+                usage.unsynced += delta
+            return
+
+        for usage, delta in batch:
+            total = totals[usage.counter_key]
+            usage.pushed += delta
+            remote = total - usage.pushed
+            if usage.seen_remote is None or remote < usage.seen_remote:
+                # First sight of this counter, or it expired: take it as the new baseline
+                usage.pushed, usage.seen_remote = min(usage.pushed, total), max(remote, 0)
+                continue
+            # Floor at -burst so a burst across workers throttles the key briefly, not for minutes
+            usage.tokens = max(usage.tokens - (remote - usage.seen_remote), -usage.limit.burst)
+            usage.seen_remote = remote
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.warning("API rate limit sync failed: %s", e)
+
+    def start(self):
+        self._task.start()
+
+    async def stop(self):
+        await self._task.stop()
+
+    def stats(self) -> dict:
+        return {
+            "limits": {tier: limit._asdict() for tier, limit in self.limits.items()},
+            "tracked_keys": len(self._usage),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "backend": "shared" if self._shared is not None else "local",
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+            "last_sync_ms": self.last_sync_ms,
+        }
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(limiter: TokenBucketLimiter, key_func=client_ip):
+    """Builds a FastAPI dependency that spends one token from limiter per request, keyed by key_func."""
+    async def dependency(request: Request):
+        await limiter.check(key_func(request))
+    return dependency
+
+
+# Every route that runs bcrypt draws from the same per-IP bucket
+password_ip_limiter = TokenBucketLimiter("password-ip", PASSWORD_IP_BURST, PASSWORD_IP_PER_MINUTE / 60, shared_store)
+login_email_limiter = TokenBucketLimiter("login-email", LOGIN_EMAIL_BURST, LOGIN_EMAIL_PER_MINUTE / 60, shared_store)
+
+
+api_rate_limiter = TierRateLimiter(
+    parse_tier_limits(API_RATE_LIMITS), API_RATE_LIMIT_DEFAULT_TIER, API_RATE_LIMIT_SYNC_SECONDS, shared_store
+)
+
+
+async def api_rate_limit(response: Response, principal: ApiPrincipal = Depends(get_api_principal)):
+    """Dependency for /api/v1: spends one token from the caller's API key and reports X-RateLimit-* headers."""
+    state = api_rate_limiter.take(principal.key_id, principal.tier)
+    headers = {
+        "X-RateLimit-Limit": str(state.limit),
+        "X-RateLimit-Remaining": str(state.remaining),
+        "X-RateLimit-Reset": str(math.ceil(state.reset_seconds)),
+    }
+    if not state.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="API rate limit exceeded for this key's tier",
+            headers={**headers, "Retry-After": str(math.ceil(state.retry_after))}
+        )
+    response.headers.update(headers)
+
+
+def stats() -> dict:
+    stats = {limiter.name: limiter.stats() for limiter in (password_ip_limiter, login_email_limiter)}
+    stats["api"] = api_rate_limiter.stats()
+    return stats
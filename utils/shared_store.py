@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# e.g. redis://localhost:6379/0 (Redis 7+ server, redis-py 5+); unset keeps every cache process-local
+SHARED_STORE_URL = os.getenv("SHARED_STORE_URL")
+SHARED_STORE_PREFIX = os.getenv("SHARED_STORE_PREFIX", "esign:")
+
+# Refills and spends a token bucket atomically, on Redis' clock so instances need not agree on time.
+# Returns the seconds until cost tokens are available as a string (Lua numbers become integers).
+_TAKE_TOKENS_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisSharedStore:
+    """Small async key-value facade over Redis, shared by every worker of every instance.
+
+    Callers treat it as best effort: errors are logged and reported as a miss so an unavailable
+    Redis only costs cache hits, never requests.
+    """
+
+    def __init__(self, url: str, prefix: str, client=None):
+        """client replaces the connection made from url, e.g. with a fakeredis stand-in in tests."""
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("SHARED_STORE_URL is set but the redis package is not installed")
+            client = redis.from_url(url)
+        self._redis = client
+        self._take_tokens = self._redis.register_script(_TAKE_TOKENS_SCRIPT)
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning("Shared store %s failed: %s", operation, error)
+
+    async def get(self, key: str):
+        try:
+            value = await self._redis.get(self._key(key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float):
+        try:
+            await self._redis.set(self._key(key), value, px=int(ttl * 1000))
+        except Exception as e:
+            self._failed("set", e)
+
+    async def add_to_set(self, set_key: str, member: str, ttl: float):
+        """Adds a member to a set whose expiry is pushed out to at least ttl."""
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.sadd(self._key(set_key), member)
+                pipe.pexpire(self._key(set_key), int(ttl * 1000), gt=True)
+                pipe.pexpire(self._key(set_key), int(ttl * 1000), nx=True)
+                await pipe.execute()
+        except Exception as e:
+            self._failed("add_to_set", e)
+
+    async def delete_set_members(self, set_key: str):
+        """Deletes every key listed in a set, then the set itself."""
+        try:
+            members = await self._redis.smembers(self._key(set_key))
+            await self._redis.delete(*(self._key(member.decode()) for member in members), self._key(set_key))
+        except Exception as e:
+            self._failed("delete_set_members", e)
+
+    async def take_tokens(self, key: str, capacity: int, refill_per_second: float, cost: int):
+        """Spends cost tokens from a shared bucket. Returns the retry delay (0 when allowed) or None on error."""
+        try:
+            retry_after = await self._take_tokens(keys=[self._key(key)], args=[capacity, refill_per_second, cost])
+        except Exception as e:
+            self._failed("take_tokens", e)
+            return None
+        return float(retry_after)
+
+    async def increment_counters(self, deltas: dict, ttl: float):
+        """Adds each delta to its counter in one round trip. Returns {key: new total}, or None on error."""
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, delta in deltas.items():
+                    pipe.incrby(self._key(key), delta)
+                    pipe.pexpire(self._key(key), int(ttl * 1000))
+                results = await pipe.execute()
+        except Exception as e:
+            self._failed("increment_counters", e)
+            return None
+        return dict(zip(deltas, results[::2]))
+
+    async def publish(self, channel: str, message: str):
+        try:
+            await self._redis.publish(self._key(channel), message)
+        except Exception as e:
+            self._failed("publish", e)
+
+    async def subscribe(self, channel: str, handler, on_subscribed=None):
+        """Calls handler(message) for every message on channel until cancelled, resubscribing after errors.
+
+        on_subscribed runs after each (re)subscription, so callers can drop state that may have missed
+        messages while the connection was down.
+        """
+        while True:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self._key(channel))
+                    if on_subscribed is not None:
+                        on_subscribed()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            handler(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed("subscribe", e)
+                await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors}
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+shared_store = RedisSharedStore(SHARED_STORE_URL, SHARED_STORE_PREFIX) if SHARED_STORE_URL else None
@@ -0,0 +1,289 @@
+import hashlib
+import mmap
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from fastapi import UploadFile
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "storage/blobs")
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# Uploads above this size are memory-mapped instead of read; Starlette spools anything over 1 MB to disk
+MMAP_MIN_SIZE = int(os.getenv("MMAP_MIN_SIZE", str(1024 * 1024)))
+# A blob committed again within this window is kept by delete, as a row about to reference it may not exist yet
+BLOB_DELETE_GRACE_SECONDS = float(os.getenv("BLOB_DELETE_GRACE_SECONDS", "300"))
+
+
+@contextmanager
+def upload_buffer(upload: UploadFile):
+    """Yields an upload's bytes without copying large spooled files into memory.
+
+    Memoryviews taken from the yielded buffer must be released before the block exits.
+    """
+    upload.file.seek(0)
+    if upload.size is None or upload.size <= MMAP_MIN_SIZE:
+        yield upload.file.read()
+        return
+    with mmap.mmap(upload.file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+
+def iter_file_chunks(path: str, start: int = 0, end: int = None, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yields bytes [start, end) of a file; end defaults to the end of the file."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class BlobWriter:
+    """Accumulates one blob in a temporary file, hashing as it goes. Finish with BlobStore.commit."""
+
+    def __init__(self, temp_path: str):
+        self.temp_path = temp_path
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._file = None
+
+    def write(self, chunk: bytes):
+        if self._file is None:
+            # Reopen in append mode so long-lived writers don't each hold a descriptor
+            self._file = open(self.temp_path, "ab")
+        self._file.write(chunk)
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def digest(self) -> bytes:
+        """SHA-256 of everything written so far; writing may continue afterwards."""
+        return self._hasher.digest()
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+    def sync_to(self, size: int):
+        """Brings the writer in line with the first size bytes of its temp file.
+
+        Anything past size (a write that was never recorded) is dropped. A writer that is behind
+        hashes only the bytes it missed; one that is ahead starts over, as hashlib state can be
+        neither rewound nor persisted. Raises FileNotFoundError/ValueError when the file is gone
+        or shorter than size.
+        """
+        self.close()
+        if self.size > size:
+            self._hasher = hashlib.sha256()
+            self.size = 0
+        if size == 0 and not os.path.exists(self.temp_path):
+            return
+        with open(self.temp_path, "r+b") as f:
+            if os.fstat(f.fileno()).st_size < size:
+                raise ValueError(f"{self.temp_path} holds fewer than {size} bytes")
+            f.truncate(size)
+            f.seek(self.size)
+            while self.size < size and (chunk := f.read(min(STREAM_CHUNK_SIZE, size - self.size))):
+                self._hasher.update(chunk)
+                self.size += len(chunk)
+
+    def stage(self) -> "StagedChunk":
+        """Starts a chunk in a side file, hashed on from the current state; see append_staged."""
+        return StagedChunk(f"{self.temp_path}.{uuid.uuid4()}.chunk", self._hasher.copy(), self.size)
+
+    def append_staged(self, staged: "StagedChunk"):
+        """Writes a staged chunk at its offset, replacing anything past it, and takes over its hash.
+        A writer that moved since the chunk was staged rehashes instead."""
+        self.close()
+        staged.close()
+        with open(self.temp_path, "r+b" if os.path.exists(self.temp_path) else "wb") as f, \
+                open(staged.path, "rb") as source:
+            f.truncate(staged.offset)
+            f.seek(staged.offset)
+            while chunk := source.read(STREAM_CHUNK_SIZE):
+                f.write(chunk)
+        if self.size == staged.offset:
+            self._hasher = staged.hasher
+            self.size = staged.offset + staged.size
+        else:
+            self.sync_to(staged.offset + staged.size)
+
+    @classmethod
+    def resume(cls, temp_path: str, size: int) -> "BlobWriter":
+        """Reopens a partially written blob, hashing its first size bytes once."""
+        writer = cls(temp_path)
+        writer.sync_to(size)
+        return writer
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+class StagedChunk:
+    """Bytes destined for a BlobWriter at a fixed offset, kept aside until the caller decides to append them."""
+
+    def __init__(self, path: str, hasher, offset: int):
+        self.path = path
+        self.hasher = hasher
+        self.offset = offset
+        self.size = 0
+        self._file = None
+
+    def write(self, chunk: bytes):
+        if self._file is None:
+            self._file = open(self.path, "wb")
+        self._file.write(chunk)
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for signed documents; the storage key is derived from the SHA-256."""
+
+    @abstractmethod
+    def writer(self) -> BlobWriter:
+        ...
+
+    @abstractmethod
+    def commit(self, writer: BlobWriter) -> str:
+        """Moves a finished writer's content into the store and returns its storage key."""
+
+    def commit_with_trailer(self, writer: BlobWriter, trailer: bytes) -> str:
+        """Appends bytes that are not part of the hashed document (a signature block), then commits."""
+        writer.write(trailer)
+        return self.commit(writer)
+
+    def put_bytes(self, data: bytes) -> tuple:
+        """Stores a small blob in one call. Returns (digest, size, storage_key)."""
+        writer = self.writer()
+        try:
+            writer.write(data)
+            return writer.hexdigest(), writer.size, self.commit(writer)
+        except Exception:
+            writer.discard()
+            raise
+
+    @abstractmethod
+    def iter_chunks(self, storage_key: str, start: int = 0, end: int = None):
+        ...
+
+    @abstractmethod
+    def exists(self, storage_key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def iter_storage_keys(self):
+        """Yields the key of every committed blob."""
+
+    @abstractmethod
+    def delete(self, storage_key: str) -> bool:
+        """Removes a blob no row references any more. Returns False when it was kept because the same
+        content was committed within BLOB_DELETE_GRACE_SECONDS, or was already gone."""
+
+    @abstractmethod
+    def remove_stale_temp_files(self, max_age_seconds: float) -> int:
+        """Deletes temp files untouched for max_age_seconds and returns how many were removed."""
+
+
+class LocalBlobStore(BlobStore):
+    """Stores blobs under root/ab/cd/<sha256> so no directory grows too large."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_dir = os.path.join(root, "tmp")
+
+    def _path(self, storage_key: str) -> str:
+        return os.path.join(self.root, storage_key[:2], storage_key[2:4], storage_key)
+
+    def writer(self) -> BlobWriter:
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        return BlobWriter(os.path.join(self._tmp_dir, f"{uuid.uuid4()}.part"))
+
+    def commit(self, writer: BlobWriter) -> str:
+        writer.close()
+        storage_key = writer.hexdigest()
+        path = self._path(storage_key)
+        if os.path.exists(path):
+            # Identical content is already stored; the touch keeps a concurrent delete from removing it
+            writer.discard()
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(writer.temp_path, path)
+        return storage_key
+
+    def iter_chunks(self, storage_key: str, start: int = 0, end: int = None):
+        return iter_file_chunks(self._path(storage_key), start, end)
+
+    def exists(self, storage_key: str) -> bool:
+        return os.path.exists(self._path(storage_key))
+
+    def iter_storage_keys(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == self.root:
+                dirnames[:] = [name for name in dirnames if os.path.join(dirpath, name) != self._tmp_dir]
+            elif os.path.relpath(dirpath, self.root).count(os.sep) == 1:
+                yield from filenames
+
+    def delete(self, storage_key: str) -> bool:
+        path = self._path(storage_key)
+        try:
+            if os.stat(path).st_mtime > time.time() - BLOB_DELETE_GRACE_SECONDS:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def remove_stale_temp_files(self, max_age_seconds: float) -> int:
+        if not os.path.isdir(self._tmp_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        with os.scandir(self._tmp_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Committed or discarded while we looked
+                    pass
+        return removed
+
+
+def _create_blob_store() -> BlobStore:
+    if STORAGE_BACKEND == "local":
+        return LocalBlobStore(BLOB_STORE_DIR)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+blob_store = _create_blob_store()
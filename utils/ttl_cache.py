@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time-to-live."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float, on_evict=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, usable=None):
+        """Returns the cached value or None, refreshing its LRU position on a hit.
+
+        usable, when given, is a predicate on the value; a value it rejects is left in place but
+        counted and returned as a miss, so callers replacing stale entries keep the hit rate honest.
+        """
+        evicted = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (usable is not None and not usable(entry[0])):
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                self.evictions += 1
+                evicted = value
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        self._evicted(evicted)
+        return None
+
+    def set(self, key, value, ttl: float = None):
+        """Stores a value; ttl overrides the cache default and is capped by it."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        evicted = []
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None and previous[0] is not value:
+                evicted.append(previous[0])
+            self._data[key] = (value, time.monotonic() + ttl)
+            while len(self._data) > self.maxsize:
+                _, (old_value, _) = self._data.popitem(last=False)
+                self.evictions += 1
+                evicted.append(old_value)
+        for value in evicted:
+            self._evicted(value)
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is not None:
+            self._evicted(entry[0])
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._data.values())
+            self._data.clear()
+        for value, _ in entries:
+            self._evicted(value)
+
+    def _evicted(self, value):
+        if value is not None and self._on_evict is not None:
+            self._on_evict(value)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class OwnerIndex:
+    """Groups cache keys by owner, so every entry of an owner can be invalidated at once.
+
+    Callers add() a key after storing its entry and discard() it from the cache's on_evict.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        # Reentrant: evictions triggered while holding it call back into discard
+        self.lock = threading.RLock()
+
+    def add(self, owner, key):
+        with self.lock:
+            self._keys.setdefault(owner, set()).add(key)
+
+    def discard(self, owner, key):
+        with self.lock:
+            keys = self._keys.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[owner]
+
+    def pop(self, owner) -> set:
+        """Forgets and returns the keys of owner; the caller invalidates them in its cache."""
+        with self.lock:
+            return self._keys.pop(owner, set())
+
+    def __len__(self):
+        with self.lock:
+            return len(self._keys)
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+from dotenv import load_dotenv
+
+from utils.crypto import SignatureBlock
+from utils.shared_store import shared_store
+from utils.ttl_cache import OwnerIndex, TTLCache
+
+load_dotenv()
+
+VERIFICATION_CACHE_SIZE = int(os.getenv("VERIFICATION_CACHE_SIZE", "50000"))
+VERIFICATION_CACHE_TTL = float(os.getenv("VERIFICATION_CACHE_TTL", "86400"))
+
+
+class VerifiedSigner(NamedTuple):
+    """Key pair whose key verified a signature. Only valid results are cached."""
+    user_id: uuid.UUID
+    key_pair_id: uuid.UUID
+
+
+class _Entry(NamedTuple):
+    cache_key: str
+    signer: VerifiedSigner
+
+
+def verification_key(document_digest: bytes, block: SignatureBlock) -> str:
+    # Hashed so arbitrarily long signatures make fixed-size keys locally and in the shared store
+    material = b"\0".join((
+        document_digest, block.signature.encode(), (block.key_id or "").encode(), (block.algorithm or "").encode()
+    ))
+    return hashlib.sha256(material).hexdigest()
+
+
+class VerificationCache:
+    """Remembers which key verified a (digest, signature) pair, so repeat checks skip the key search and
+    the public-key operation. Relationship checks are never cached; they stay per request.
+
+    Entries live in a process-local LRU and, when SHARED_STORE_URL is set, in the shared store.
+    Each key pair keeps an index of its entries so deleting the key pair drops them everywhere.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared=None):
+        self._local = TTLCache("verification results", maxsize, ttl, on_evict=self._unindex)
+        self._shared = shared
+        self._by_key_pair = OwnerIndex()
+        self.shared_hits = 0
+
+    def _unindex(self, entry: _Entry):
+        self._by_key_pair.discard(entry.signer.key_pair_id, entry.cache_key)
+
+    def _set_local(self, cache_key: str, signer: VerifiedSigner):
+        # Set first: replacing an existing entry unindexes its key
+        self._local.set(cache_key, _Entry(cache_key, signer))
+        self._by_key_pair.add(signer.key_pair_id, cache_key)
+
+    async def get(self, document_digest: bytes, block: SignatureBlock):
+        """Returns the cached VerifiedSigner, or None."""
+        cache_key = verification_key(document_digest, block)
+        entry = self._local.get(cache_key)
+        if entry is not None:
+            return entry.signer
+        if self._shared is None:
+            return None
+
+        value = await self._shared.get(f"verify:{cache_key}")
+        if value is None:
+            return None
+        user_id, key_pair_id = value.split(":")
+        signer = VerifiedSigner(uuid.UUID(user_id), uuid.UUID(key_pair_id))
+        self.shared_hits += 1
+        self._set_local(cache_key, signer)
+        return signer
+
+    async def put(self, document_digest: bytes, block: SignatureBlock, signer: VerifiedSigner):
+        cache_key = verification_key(document_digest, block)
+        self._set_local(cache_key, signer)
+        if self._shared is not None:
+            ttl = self._local.ttl
+            await self._shared.set(f"verify:{cache_key}", f"{signer.user_id}:{signer.key_pair_id}", ttl)
+            await self._shared.add_to_set(f"verify-by-key:{signer.key_pair_id}", f"verify:{cache_key}", ttl)
+
+    async def invalidate_key_pair(self, key_pair_id):
+        cache_keys = self._by_key_pair.pop(key_pair_id)
+        for cache_key in cache_keys:
+            self._local.invalidate(cache_key)
+        if self._shared is not None:
+            await self._shared.delete_set_members(f"verify-by-key:{key_pair_id}")
+
+    def stats(self) -> dict:
+        stats = self._local.stats()
+        stats["shared_hits"] = self.shared_hits
+        stats["shared_store"] = self._shared.stats() if self._shared is not None else None
+        return stats
+
+
+verification_cache = VerificationCache(VERIFICATION_CACHE_SIZE, VERIFICATION_CACHE_TTL, shared_store)